@@ -0,0 +1,113 @@
+"""
+    Arrival sources for the gate model
+
+    An arrival source is an iterator of (gap, count) pairs: the minutes from
+    the previous arrival (or from the start) to the next one, and how many
+    people it brings. GateModel takes the next pair only once the previous bus
+    has arrived, so a source is never more than one arrival ahead of the
+    simulation, and an unbounded source lasts as long as the run does in
+    constant memory:
+
+        scheduled_arrivals  pre-drawn lists, such as gate_model.ARRIVALS/ON_BOARD
+        poisson_arrivals    synthetic arrivals whose rate follows the time of day
+        trace_arrivals      arrivals replayed from a recorded timestamp file
+
+    A trace file has one arrival per line, a timestamp and optionally how many
+    people arrived (1 if left out), separated by a comma or whitespace.
+    Timestamps are minutes, or ISO 8601 date-times such as a turnstile log
+    writes. Blank lines, lines starting with # and a header line are skipped:
+
+        2020-02-08T08:00:12,45
+        2020-02-08T08:03:40,87
+"""
+
+from datetime import datetime
+
+FLAT = (1,)
+CHUNK_SIZE = 1 << 16  # Bytes of a trace file read at a time
+
+
+def scheduled_arrivals(arrivals, on_board):
+    """
+        Arrivals from lists of gaps and people on board, in the order of
+        gate_model.ARRIVALS, i.e. the first arrival last. Ends with the shorter
+        list
+    """
+    return zip(reversed(arrivals), reversed(on_board))
+
+
+def poisson_arrivals(rng, mean_gap, sizes=None, profile=FLAT, start=0):
+    """
+        Endless arrivals of a Poisson process whose rate is profile[i] times
+        1 / mean_gap in the i-th of len(profile) equal slots of the day, e.g.
+        an hourly rate for 24 slots. start is the time of day at minute 0 of
+        the run, in minutes after midnight. sizes(rng) draws the people of an
+        arrival, 1 by default
+
+        Arrivals are drawn at the peak rate and kept with probability
+        rate / peak (thinning, after Lewis and Shedler), so with the FLAT
+        profile the gaps are the plain rng.expovariate(1 / mean_gap) draws
+    """
+    peak = max(profile)
+    if peak <= 0:
+        raise ValueError("an arrival profile needs at least one positive rate")
+    slot_minutes = 24 * 60 / len(profile)
+    time = start
+    gap = 0
+    while True:
+        candidate = rng.expovariate(peak / mean_gap)
+        time += candidate
+        gap += candidate
+        rate = profile[int(time // slot_minutes) % len(profile)]
+        if rate < peak and rng.random() * peak >= rate:
+            continue
+        yield gap, sizes(rng) if sizes is not None else 1
+        gap = 0
+
+
+def parse_timestamp(text):
+    try:
+        return float(text)
+    except ValueError:
+        return datetime.fromisoformat(text)
+
+
+def trace_arrivals(path, start=None, chunk_size=CHUNK_SIZE):
+    """
+        Arrivals replayed from a trace file (see the format above), read
+        chunk_size bytes at a time. The run starts at start, a timestamp in the
+        units of the file, or at the first arrival if None. Raises ValueError
+        for an arrival before the previous one
+    """
+    last = start
+    header = True
+    number = 0
+    with open(path) as infile:
+        while True:
+            lines = infile.readlines(chunk_size)
+            if not lines:
+                break
+            for line in lines:
+                number += 1
+                fields = line.replace(",", " ").split()
+                if not fields or fields[0].startswith("#"):
+                    continue
+                try:
+                    timestamp = parse_timestamp(fields[0])
+                    count = int(fields[1]) if len(fields) > 1 else 1
+                except ValueError:
+                    if header:
+                        header = False
+                        continue
+                    raise ValueError(f"{path}:{number}: not a timestamp and count: {line.strip()!r}") from None
+                header = False
+
+                if last is None:
+                    last = timestamp
+                gap = timestamp - last
+                if not isinstance(gap, float):
+                    gap = gap.total_seconds() / 60
+                if gap < 0:
+                    raise ValueError(f"{path}:{number}: arrival before the previous one")
+                yield gap, count
+                last = timestamp
@@ -0,0 +1,100 @@
+"""
+    Batch mass-ratio sweep for the Feynman block problem
+
+    Runs many (mass ratio, initial velocity) systems at once, advancing them in
+    lockstep as NumPy arrays. With block 1 at rest between the wall and block 2
+    (the layout of scratch2.py), the order of collisions only depends on the
+    velocities: block 1 hits block 2 while it is faster, and hits the wall while
+    it moves left. Positions therefore never need to be tracked.
+"""
+
+import time
+
+import numpy as np
+
+from collision_engine import elastic_collision
+
+RESULT_DTYPE = np.dtype([
+    ("mass_ratio", np.float64),
+    ("init_vel", np.float64),
+    ("collisions", np.int64),
+    ("v1", np.float64),
+    ("v2", np.float64),
+])
+
+
+def count_collisions(mass_ratios, init_vels, r1_mass=1.0):
+    """
+        Counts the collisions for every system described by mass_ratios and
+        init_vels, which are broadcast against each other (use grid() for every
+        combination). init_vels is the signed velocity of block 2, as in
+        scratch2.py, so negative values move it towards the wall.
+
+        A system is retired as soon as no further collision can happen (see
+        collision_engine.is_done). Returns a structured array of RESULT_DTYPE
+        with the shape of the broadcast inputs.
+    """
+    mass_ratios, init_vels = np.broadcast_arrays(np.asarray(mass_ratios, dtype=np.float64),
+                                                 np.asarray(init_vels, dtype=np.float64))
+    results = np.zeros(mass_ratios.shape, dtype=RESULT_DTYPE)
+    results["mass_ratio"] = mass_ratios
+    results["init_vel"] = init_vels
+    flat = results.reshape(-1)
+
+    # State of the systems still running; idx maps them back into flat
+    idx = np.arange(flat.size)
+    m1 = np.full(flat.size, float(r1_mass))
+    m2 = flat["mass_ratio"] * r1_mass
+    v1 = np.zeros(flat.size)
+    v2 = flat["init_vel"].copy()
+    count = np.zeros(flat.size, dtype=np.int64)
+
+    while idx.size > 0:
+        done = (v1 >= 0) & (v1 <= v2)
+        if done.any():
+            retired = idx[done]
+            flat["collisions"][retired] = count[done]
+            flat["v1"][retired] = v1[done]
+            flat["v2"][retired] = v2[done]
+
+            running = ~done
+            idx, m1, m2, v1, v2, count = idx[running], m1[running], m2[running], v1[running], v2[running], count[running]
+            if idx.size == 0:
+                break
+
+        # Block 1 catches up with block 2
+        block = v1 > v2
+        new_v1, new_v2 = elastic_collision(m1, v1, m2, v2)
+        v1 = np.where(block, new_v1, v1)
+        v2 = np.where(block, new_v2, v2)
+        count += block
+
+        # Block 1 bounces off the wall
+        wall = v1 < 0
+        v1 = np.where(wall, -v1, v1)
+        count += wall
+
+    return results
+
+
+def grid(mass_ratios, init_vels, r1_mass=1.0):
+    """
+        Runs every combination of mass_ratios and init_vels. The result has one
+        row per mass ratio and one column per initial velocity
+    """
+    mass_ratios = np.asarray(mass_ratios, dtype=np.float64)
+    init_vels = np.asarray(init_vels, dtype=np.float64)
+    return count_collisions(mass_ratios[:, None], init_vels[None, :], r1_mass)
+
+
+if __name__ == "__main__":
+    MASS_RATIOS = [100**k for k in range(1, 6)]
+    INIT_VEL_VALUES = -np.logspace(-3, 1, 200)
+
+    start = time.perf_counter()
+    table = grid(MASS_RATIOS, INIT_VEL_VALUES)
+    elapsed = time.perf_counter() - start
+
+    print(f"Ran {table.size} systems in {round(elapsed, 2)}s")
+    for row in table[:, 0]:
+        print(f"Mass ratio {int(row['mass_ratio'])}: {row['collisions']} collisions")
@@ -0,0 +1,184 @@
+"""
+    Benchmarks for the collision engines, checked against the digits of pi
+
+    Runs the Feynman scenario (light block at rest, heavy block moving towards
+    it) for mass ratios 100**1 .. 100**6 on each engine:
+
+        tk      StepSimulation drawn on a Tk canvas every step (needs a display)
+        step    StepSimulation, headless
+        event   CollisionEngine
+        fast    fast_count
+
+    and reports wall time, collisions per second and peak traced memory. For
+    mass ratio 100**k the collision count must equal the first k + 1 digits of
+    pi; any mismatch is reported and makes the script exit with status 1. The
+    results go to a JSON file so runs can be compared between versions.
+
+        python bench_collisions.py --output bench.json
+        python bench_collisions.py --engines event fast --exponents 1 2 3 4 5 6
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from collision_engine import Block, CollisionEngine, StepSimulation
+from fast_count import fast_count
+
+PI_DIGITS = "314159265358979"
+
+# The fixed-step engines only get the right answer when the heavy block moves
+# slowly enough, and their run time grows tenfold with every exponent
+ENGINE_EXPONENTS = {
+    "tk": range(1, 3),
+    "step": range(1, 4),
+    "event": range(1, 7),
+    "fast": range(1, 7),
+}
+
+
+def expected_collisions(exponent):
+    return int(PI_DIGITS[:exponent + 1])
+
+
+def step_velocity(exponent):
+    return 10.0 ** -exponent
+
+
+def run_step(exponent):
+    simulation = StepSimulation(Block(1700, 100, 1, 0), Block(1900, 100, 100**exponent, -step_velocity(exponent)))
+    while not simulation.is_done() and not simulation.crossed:
+        simulation.step()
+    return simulation.num_collisions
+
+
+class EngineUnavailable(Exception):
+    """
+        Raised by a runner that cannot run here at all, such as tk without
+        tkinter or a display. Any other error is a failure of the engine
+    """
+
+
+def run_tk(exponent):
+    try:
+        import tkinter as tk
+    except ImportError as error:
+        raise EngineUnavailable(error) from error
+    try:
+        root = tk.Tk()
+    except tk.TclError as error:
+        raise EngineUnavailable(error) from error
+    from block_view import MovingRectangle, Viewport
+
+    try:
+        canvas = tk.Canvas(root, width=2000, height=400, bg="white")
+        canvas.pack()
+        viewport = Viewport(2000)
+        simulation = StepSimulation(Block(1700, 100, 1, 0), Block(1900, 100, 100**exponent, -step_velocity(exponent)))
+        rects = [MovingRectangle(canvas, block, 200, 300, color)
+                 for block, color in ((simulation.block1, "blue"), (simulation.block2, "red"))]
+        while not simulation.is_done() and not simulation.crossed:
+            simulation.step()
+            for rect in rects:
+                rect.draw(viewport)
+            root.update()
+        return simulation.num_collisions
+    finally:
+        root.destroy()
+
+
+def run_event(exponent):
+    engine = CollisionEngine(Block(1700, 100, 1, 0), Block(1900, 100, 100**exponent, -1))
+    return engine.run()
+
+
+def run_fast(exponent):
+    return fast_count(1, 100**exponent, 0, -1)[0]
+
+
+RUNNERS = {"tk": run_tk, "step": run_step, "event": run_event, "fast": run_fast}
+
+
+def measure(engine, exponent, trace_memory=True):
+    runner = RUNNERS[engine]
+
+    start = time.perf_counter()
+    collisions = runner(exponent)
+    wall_time = time.perf_counter() - start
+
+    # Memory is traced in a second run, since tracing slows the first one down
+    peak_memory = None
+    if trace_memory:
+        tracemalloc.start()
+        runner(exponent)
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    expected = expected_collisions(exponent)
+    return {
+        "engine": engine,
+        "exponent": exponent,
+        "collisions": collisions,
+        "expected": expected,
+        "correct": collisions == expected,
+        "wall_time": wall_time,
+        "collisions_per_second": collisions / wall_time if wall_time > 0 else None,
+        "peak_memory": peak_memory,
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--engines", nargs="+", choices=list(RUNNERS), default=list(RUNNERS))
+    parser.add_argument("--exponents", type=int, nargs="+", default=None,
+                        help="mass ratios 100**k to run (default: every ratio practical for the engine)")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--no-memory", action="store_true", help="skip the traced-memory runs")
+    args = parser.parse_args()
+
+    results = []
+    for engine in args.engines:
+        exponents = args.exponents or ENGINE_EXPONENTS[engine]
+        for exponent in exponents:
+            try:
+                result = measure(engine, exponent, trace_memory=not args.no_memory)
+            except EngineUnavailable as error:
+                print(f"{engine:>5} 100**{exponent}: skipped ({error})")
+                results.append({"engine": engine, "exponent": exponent, "skipped": str(error)})
+                break
+            results.append(result)
+
+            status = "ok" if result["correct"] else f"WRONG, expected {result['expected']}"
+            memory = f"{round(result['peak_memory'] / 1024)} KiB" if result["peak_memory"] is not None else "-"
+            rate = result["collisions_per_second"]
+            print(f"{engine:>5} 100**{exponent}: {result['collisions']} collisions in "
+                  f"{round(result['wall_time'], 4)}s ({int(rate) if rate else '-'}/s, {memory}) {status}")
+
+    with open(args.output, "w") as outfile:
+        json.dump({
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "results": results,
+        }, outfile, indent=2)
+
+    if not all(result.get("correct", True) for result in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+    Tk views for the block simulations
+
+    The physics lives in the Block models from collision_engine.py; the classes
+    here only copy that state onto a canvas when a frame is drawn, projecting
+    world x-coordinates through a Viewport. Zooming changes the Viewport, never
+    the models, and only the items on screen are redrawn.
+"""
+
+class Viewport:
+    """
+        Horizontal world to screen transform: screen_x = (x - offset) * scale
+    """
+
+    def __init__(self, width, scale=1.0, offset=0.0):
+        self.width = width
+        self.scale = scale
+        self.offset = offset
+
+    def to_screen(self, x):
+        return (x - self.offset) * self.scale
+
+    def visible_range(self):
+        return self.offset, self.offset + self.width / self.scale
+
+    def zoom_to_fit(self, max_x):
+        """
+            Zooms out just enough for world x-coordinate max_x to be on screen.
+            Returns True if the zoom changed
+        """
+        if self.to_screen(max_x) <= self.width:
+            return False
+        self.scale = self.width / (max_x - self.offset)
+        return True
+
+
+class MovingRectangle:
+    def __init__(self, canvas, block, y1, y2, color):
+        self.canvas = canvas
+        self.block = block
+        self.y1 = y1
+        self.y2 = y2
+        self.rectangle = canvas.create_rectangle(block.x, y1, block.x + block.width, y2, fill=color)
+        self.text = canvas.create_text(block.x + block.width / 2, (y1 + y2) / 2, text="", fill="white")
+        self.collision_processed = False  # Flag to track if collision has been processed
+
+        self.draw()
+
+    @property
+    def mass(self):
+        return self.block.mass
+
+    @property
+    def velocity(self):
+        return self.block.velocity
+
+    @velocity.setter
+    def velocity(self, velocity):
+        self.block.velocity = velocity
+
+    @property
+    def num_collisions(self):
+        return self.block.num_collisions
+
+    @num_collisions.setter
+    def num_collisions(self, num_collisions):
+        self.block.num_collisions = num_collisions
+
+    def move(self):
+        self.block.x += self.block.velocity
+
+    def draw(self, viewport=None):
+        """
+            Syncs the canvas items from the model
+        """
+        x1, x2 = self.block.x, self.block.x + self.block.width
+        if viewport is not None:
+            x1, x2 = viewport.to_screen(x1), viewport.to_screen(x2)
+        self.canvas.coords(self.rectangle, x1, self.y1, x2, self.y2)
+        self.canvas.coords(self.text, (x1 + x2) / 2, (self.y1 + self.y2) / 2)
+        self.update_velocity_text()
+
+    def update_velocity_text(self):
+        self.canvas.itemconfig(self.text, text=f"{self.block.mass} kg\n{round(self.block.velocity, 8)}")
+
+
+class Track:
+    """
+        The wall at left_x and the floor line, with a Ruler along the floor
+    """
+
+    def __init__(self, canvas, viewport, left_x, y, top=100, tick_spacing=50):
+        self.canvas = canvas
+        self.left_x = left_x
+        self.y = y
+        self.top = top
+        self.wall_left = canvas.create_line(0, 0, 0, 0, width=2, fill="black")
+        self.wall_bottom = canvas.create_line(0, 0, 0, 0, width=2, fill="black")
+        self.draw_walls(viewport)
+        self.ruler = Ruler(canvas, viewport, y, tick_spacing)
+
+    def draw(self, viewport):
+        self.draw_walls(viewport)
+        self.ruler.update(viewport)
+
+    def draw_walls(self, viewport):
+        left_x = viewport.to_screen(self.left_x)
+        self.canvas.coords(self.wall_left, left_x, self.y, left_x, self.top)
+        self.canvas.coords(self.wall_bottom, left_x, self.y, viewport.width, self.y)
+
+
+class Ruler:
+    """
+        Tick marks and labels along the floor line, created only for the part of
+        the world that is on screen. The tick spacing widens as the view zooms
+        out, so the number of canvas items stays bounded by the canvas width.
+        Call update() whenever the viewport changes
+    """
+
+    min_tick_pixels = 40
+
+    def __init__(self, canvas, viewport, y, tick_spacing=50):
+        self.canvas = canvas
+        self.y = y
+        self.tick_spacing = tick_spacing
+        self.items = []
+        self.update(viewport)
+
+    def spacing_for(self, scale):
+        spacing = self.tick_spacing
+        steps = (2, 2.5, 2)  # 50, 100, 250, 500, 1000, ...
+        i = 0
+        while spacing * scale < self.min_tick_pixels:
+            spacing *= steps[i % len(steps)]
+            i += 1
+        return spacing
+
+    def update(self, viewport):
+        for item in self.items:
+            self.canvas.delete(item)
+        self.items = []
+
+        spacing = self.spacing_for(viewport.scale)
+        first, last = viewport.visible_range()
+        x = int(first // spacing) * spacing
+        while x <= last:
+            screen_x = viewport.to_screen(x)
+            self.items.append(self.canvas.create_line(screen_x, self.y - 5, screen_x, self.y + 5, width=1, fill="black"))
+            self.items.append(self.canvas.create_text(screen_x, self.y + 15, text=str(int(x)), anchor='n', font=("Helvetica", 8)))
+            x += spacing
+
+
+class DiskView:
+    """
+        Draws a disks2d.DiskSystem as ovals. Only the first max_disks bodies get
+        a canvas item, so attaching a view to a large system stays cheap
+    """
+
+    def __init__(self, canvas, system, max_disks=5_000, color="blue"):
+        self.canvas = canvas
+        self.system = system
+        self.count = min(len(system), max_disks)
+        self.ovals = [canvas.create_oval(0, 0, 0, 0, fill=color, outline="") for _ in range(self.count)]
+        self.draw()
+
+    def draw(self):
+        positions = self.system.positions[:self.count]
+        radii = self.system.radii[:self.count]
+        for oval, (x, y), r in zip(self.ovals, positions.tolist(), radii.tolist()):
+            self.canvas.coords(oval, x - r, y - r, x + r, y + r)
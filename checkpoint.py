@@ -0,0 +1,170 @@
+"""
+    Checkpoint and resume for long collision runs
+
+    A checkpoint is a small JSON file with everything needed to carry on: the
+    blocks (position, width, mass, velocity, collision count), the wall, the
+    simulated time and the total collision count. Floats are written with repr,
+    so a resumed run continues bit-for-bit where the checkpoint was taken.
+    Files are written to a temporary name and renamed over the old checkpoint,
+    so a crash mid-write never leaves a truncated file behind.
+
+    Both the event-driven CollisionEngine and the fixed-step StepSimulation of
+    feynman.py can be checkpointed:
+
+        python checkpoint.py start run.json 7
+        python checkpoint.py resume run.json
+        python checkpoint.py resume run.json --visual  # event engine checkpoints only
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+
+from collision_engine import Block, CollisionEngine, StepSimulation, feynman_engine
+
+CHECKPOINT_INTERVAL = 60  # Seconds of wall time between checkpoints
+CHECK_EVERY = 10_000  # Collisions (or steps) between looks at the clock
+
+
+def save_checkpoint(simulation, path):
+    state = {
+        "engine": "step" if isinstance(simulation, StepSimulation) else "event",
+        "leftX": simulation.left_x,
+        "numCollisions": simulation.num_collisions,
+        "wallImpulse": simulation.wall_impulse,
+        "blocks": [
+            {"x": b.x, "width": b.width, "mass": b.mass, "velocity": b.velocity, "numCollisions": b.num_collisions}
+            for b in (simulation.block1, simulation.block2)
+        ],
+    }
+    if state["engine"] == "step":
+        state["numSteps"] = simulation.num_steps
+        state["crossed"] = simulation.crossed
+    else:
+        state["time"] = simulation.time
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".checkpoint-")
+    try:
+        with os.fdopen(fd, "w") as outfile:
+            json.dump(state, outfile)
+            outfile.flush()
+            os.fsync(outfile.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def load_checkpoint(path):
+    """
+        Returns the CollisionEngine or StepSimulation saved at path
+    """
+    with open(path) as infile:
+        state = json.load(infile)
+
+    blocks = []
+    for saved in state["blocks"]:
+        block = Block(saved["x"], saved["width"], saved["mass"], saved["velocity"])
+        block.num_collisions = saved["numCollisions"]
+        blocks.append(block)
+
+    if state["engine"] == "step":
+        simulation = StepSimulation(blocks[0], blocks[1], state["leftX"])
+        simulation.num_steps = state["numSteps"]
+        simulation.crossed = state["crossed"]
+    else:
+        simulation = CollisionEngine(blocks[0], blocks[1], state["leftX"])
+        simulation.time = state["time"]
+        simulation.num_collisions = state["numCollisions"]
+    simulation.wall_impulse = state.get("wallImpulse", 0.0)
+    return simulation
+
+
+class Checkpointer:
+    """
+        Saves simulation to path every interval seconds. The clock is only read
+        every check_every calls to tick(), so the cost per collision or step is
+        a decrement and a comparison. Call tick() from a step loop, or check()
+        between batches of collisions
+    """
+
+    def __init__(self, simulation, path, interval=CHECKPOINT_INTERVAL, check_every=CHECK_EVERY):
+        self.simulation = simulation
+        self.path = path
+        self.interval = interval
+        self.check_every = check_every
+        self.countdown = check_every
+        self.last_save = time.perf_counter()
+
+    def tick(self):
+        self.countdown -= 1
+        if self.countdown > 0:
+            return
+        self.countdown = self.check_every
+        self.check()
+
+    def check(self):
+        if time.perf_counter() - self.last_save >= self.interval:
+            self.save()
+
+    def on_collision(self, engine, kind):
+        self.tick()
+
+    def save(self):
+        save_checkpoint(self.simulation, self.path)
+        self.last_save = time.perf_counter()
+
+
+def run_with_checkpoints(simulation, path, interval=CHECKPOINT_INTERVAL):
+    """
+        Runs simulation headless to the end, checkpointing along the way and
+        once more when it finishes
+    """
+    checkpointer = Checkpointer(simulation, path, interval)
+    if isinstance(simulation, StepSimulation):
+        # Same batching as below: a tight loop of steps, then one look at the clock
+        step, is_done = simulation.step, simulation.is_done
+        while not is_done() and not simulation.crossed:
+            for _ in range(checkpointer.check_every):
+                step()
+                if simulation.crossed or is_done():
+                    break
+            checkpointer.check()
+    else:
+        # Run in batches rather than as an observer, so collisions cost nothing extra
+        while True:
+            before = simulation.num_collisions
+            simulation.run(max_collisions=checkpointer.check_every)
+            if simulation.num_collisions - before < checkpointer.check_every:
+                break
+            checkpointer.check()
+    checkpointer.save()
+    return simulation
+
+
+if __name__ == "__main__":
+    command, path = sys.argv[1], sys.argv[2]
+    if command == "start":
+        exponent = int(sys.argv[3]) if len(sys.argv) > 3 else 3
+        simulation = feynman_engine(100**exponent, .01)
+    else:
+        simulation = load_checkpoint(path)
+        print(f"Resuming from {simulation.num_collisions} collisions")
+
+    if "--visual" in sys.argv and not isinstance(simulation, CollisionEngine):
+        sys.exit(f"{path} is a step checkpoint: resume it with feynman.py --resume to watch it")
+    if "--visual" in sys.argv:
+        import tkinter as tk
+        from playback import Playback
+
+        root = tk.Tk()
+        root.title("Moving Rectangles and Wall Example")
+        simulation.add_observer(Checkpointer(simulation, path))
+        app = Playback(root, simulation)
+        root.mainloop()
+    else:
+        run_with_checkpoints(simulation, path)
+        print(f"Finished with {simulation.num_collisions} collisions")
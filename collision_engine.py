@@ -0,0 +1,243 @@
+"""
+    Headless, event-driven engine for the Feynman block problem
+
+    Instead of nudging the blocks by their velocity once per frame and checking
+    for overlap afterwards (see move_rectangles in feynman.py), the engine solves
+    for the exact time of the next block-block or block-wall collision and jumps
+    straight to it. The cost of a run is therefore proportional to the number of
+    collisions, not to the distance travelled or the size of the velocities.
+
+    Nothing in here touches Tk, so the physics can run without a display.
+"""
+
+import math
+import time
+
+LEFT_X = 100
+BLOCK_WIDTH = 100
+
+BLOCK_COLLISION = "block"
+WALL_COLLISION = "wall"
+CROSSED_WALL = "crossed"
+
+
+class Block:
+    __slots__ = ("x", "width", "mass", "velocity", "num_collisions")
+
+    def __init__(self, x, width, mass, velocity):
+        self.x = x
+        self.width = width
+        self.mass = mass
+        self.velocity = velocity
+        self.num_collisions = 0
+
+    @property
+    def right(self):
+        return self.x + self.width
+
+
+def elastic_collision(m1, v1, m2, v2):
+    """
+        Returns the velocities of two bodies after a 1D elastic collision
+    """
+    new_v1 = ((m1 - m2) * v1 + 2 * m2 * v2) / (m1 + m2)
+    new_v2 = ((m2 - m1) * v2 + 2 * m1 * v1) / (m1 + m2)
+    return new_v1, new_v2
+
+
+def is_done(v1, v2):
+    """
+        True once no further collision can happen: the small block moves away from
+        the wall, and no faster than the large block. This is the termination test
+        from scratch2.py with the boundary cases (a block at rest, equal speeds)
+        included, so that a run can never stall on them.
+    """
+    return 0 <= v1 <= v2
+
+
+class CollisionEngine:
+    """
+        Two blocks on a line with a wall at left_x. block1 is the one between the
+        wall and block2, exactly like rect1/rect2 in feynman.py.
+    """
+
+    def __init__(self, block1, block2, left_x=LEFT_X):
+        self.block1 = block1
+        self.block2 = block2
+        self.left_x = left_x
+        self.time = 0.0
+        self.num_collisions = 0
+        self.wall_impulse = 0.0  # Total momentum the wall has given the blocks
+        self.observers = []
+
+    @property
+    def blocks(self):
+        return self.block1, self.block2
+
+    def add_observer(self, observer):
+        """
+            observer.on_collision(engine, kind) is called after every collision
+            has been resolved
+        """
+        self.observers.append(observer)
+
+    def time_to_next_collision(self):
+        """
+            Returns a tuple of (dt, kind) for the next collision. When no further
+            collision is possible, dt is math.inf and kind is None
+        """
+        b1, b2 = self.block1, self.block2
+        dt, kind = math.inf, None
+        if b1.velocity > b2.velocity:
+            gap = max(b2.x - b1.x - b1.width, 0.0)
+            dt, kind = gap / (b1.velocity - b2.velocity), BLOCK_COLLISION
+        if b1.velocity < 0:
+            wall_dt = max(b1.x - self.left_x, 0.0) / -b1.velocity
+            if wall_dt < dt:
+                dt, kind = wall_dt, WALL_COLLISION
+        return dt, kind
+
+    def step(self):
+        """
+            Advances the system to the next collision and resolves it.
+            Returns the kind of collision, or None if there are none left
+        """
+        dt, kind = self.time_to_next_collision()
+        if kind is not None:
+            self._collide(dt, kind)
+        return kind
+
+    def _collide(self, dt, kind):
+        b1, b2 = self.block1, self.block2
+        b2.x += b2.velocity * dt
+        self.time += dt
+
+        if kind is BLOCK_COLLISION:
+            # Snap to the contact point so that rounding never lets the blocks overlap
+            b1.x = b2.x - b1.width
+            b1.velocity, b2.velocity = elastic_collision(b1.mass, b1.velocity, b2.mass, b2.velocity)
+            b2.num_collisions += 1
+        else:
+            b1.x = self.left_x
+            b1.velocity = -b1.velocity
+            self.wall_impulse += 2 * b1.mass * b1.velocity
+
+        b1.num_collisions += 1
+        self.num_collisions += 1
+        for observer in self.observers:
+            observer.on_collision(self, kind)
+
+    def advance_to(self, t):
+        """
+            Resolves every collision that happens no later than t. The blocks are
+            left at the last collision; positions_at(t) extrapolates from there
+        """
+        while True:
+            dt, kind = self.time_to_next_collision()
+            if kind is None or self.time + dt > t:
+                return
+            self._collide(dt, kind)
+
+    def positions_at(self, t):
+        """
+            Returns the x of both blocks at time t, which must not be before the
+            last resolved collision or after the next one
+        """
+        b1, b2 = self.block1, self.block2
+        return b1.x + b1.velocity * (t - self.time), b2.x + b2.velocity * (t - self.time)
+
+    def run(self, max_collisions=None):
+        """
+            Steps until no collision is left (or until max_collisions have been
+            processed in this call). Returns the total number of collisions
+        """
+        processed = 0
+        while max_collisions is None or processed < max_collisions:
+            if self.step() is None:
+                break
+            processed += 1
+        return self.num_collisions
+
+    def is_done(self):
+        return is_done(self.block1.velocity, self.block2.velocity)
+
+
+class StepSimulation:
+    """
+        The fixed-step physics of move_rectangles in feynman.py, run on Block
+        models instead of canvas items: every step moves each block by its
+        velocity and then resolves whatever overlaps. CROSSED_WALL marks the
+        invalid case of block2 reaching the wall.
+    """
+
+    def __init__(self, block1, block2, left_x=LEFT_X):
+        self.block1 = block1
+        self.block2 = block2
+        self.left_x = left_x
+        self.num_steps = 0
+        self.crossed = False
+        self.wall_impulse = 0.0
+
+    @property
+    def blocks(self):
+        return self.block1, self.block2
+
+    @property
+    def num_collisions(self):
+        return self.block1.num_collisions
+
+    def step(self):
+        """
+            Moves both blocks one step and returns the list of collisions that
+            happened during it, in the order they were resolved
+        """
+        b1, b2 = self.block1, self.block2
+        b1.x += b1.velocity
+        b2.x += b2.velocity
+        self.num_steps += 1
+
+        collisions = []
+        if b1.x <= b2.x + b2.width and b1.x + b1.width >= b2.x:
+            b1.velocity, b2.velocity = elastic_collision(b1.mass, b1.velocity, b2.mass, b2.velocity)
+            b1.num_collisions += 1
+            b2.num_collisions += 1
+            collisions.append(BLOCK_COLLISION)
+
+        if b1.x <= self.left_x:
+            b1.velocity *= -1
+            b1.x = self.left_x
+            self.wall_impulse += 2 * b1.mass * b1.velocity
+            b1.num_collisions += 1
+            collisions.append(WALL_COLLISION)
+
+        if b2.x <= self.left_x:
+            b2.velocity *= -1
+            self.wall_impulse += 2 * b2.mass * b2.velocity
+            b2.num_collisions += 1
+            self.crossed = True
+            collisions.append(CROSSED_WALL)
+
+        return collisions
+
+    def is_done(self):
+        return is_done(self.block1.velocity, self.block2.velocity)
+
+
+def feynman_engine(r2_mass, init_vel, r1_mass=1, left_x=LEFT_X, width=BLOCK_WIDTH):
+    """
+        Builds the layout used by feynman.py: a light block at rest 300 units in
+        from the right of a 2000 wide screen, and the heavy block 100 units behind
+        it moving towards the wall at init_vel
+    """
+    block1 = Block(1700, width, r1_mass, 0)
+    block2 = Block(1900, width, r2_mass, -init_vel)
+    return CollisionEngine(block1, block2, left_x)
+
+
+if __name__ == "__main__":
+    for k in range(1, 7):
+        engine = feynman_engine(100**k, 0.01)
+        start = time.perf_counter()
+        engine.run()
+        elapsed = time.perf_counter() - start
+        print(f"Mass ratio 100**{k}: {engine.num_collisions} collisions in {round(elapsed, 3)}s")
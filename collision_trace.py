@@ -0,0 +1,171 @@
+"""
+    Binary collision traces
+
+    TraceRecorder is a CollisionEngine observer that appends one fixed-size
+    record per collision to a NumPy buffer, and writes the buffer to disk a
+    chunk at a time. The set-up of the run (masses, widths, the wall and the
+    starting state) goes into a small JSON file next to the trace.
+
+    TraceReplay memory-maps a trace, so collision #k is found in O(1) and any
+    instant in O(log n), without re-simulating. It has the same interface as
+    CollisionEngine as far as playback.Playback is concerned:
+
+        python collision_trace.py record run.trace 5
+        python collision_trace.py replay run.trace 250000
+"""
+
+import json
+import os
+import sys
+
+import numpy as np
+
+from collision_engine import Block, BLOCK_COLLISION, WALL_COLLISION, is_done
+
+TRACE_DTYPE = np.dtype([
+    ("time", np.float64),
+    ("kind", np.uint8),
+    ("index", np.int64),  # Collision number, counting from 1
+    ("v1", np.float64),
+    ("v2", np.float64),
+    ("x1", np.float64),
+    ("x2", np.float64),
+])
+
+KIND_CODES = {BLOCK_COLLISION: 0, WALL_COLLISION: 1}
+CHUNK_SIZE = 1 << 16
+
+
+def header_path(path):
+    return path + ".json"
+
+
+class TraceRecorder:
+    def __init__(self, engine, path, chunk_size=CHUNK_SIZE):
+        self.path = path
+        self.buffer = np.empty(chunk_size, dtype=TRACE_DTYPE)
+        self.count = 0
+
+        b1, b2 = engine.block1, engine.block2
+        with open(header_path(path), "w") as outfile:
+            json.dump({
+                "leftX": engine.left_x,
+                "time": engine.time,
+                "numCollisions": engine.num_collisions,
+                "blocks": [
+                    {"x": b.x, "width": b.width, "mass": b.mass, "velocity": b.velocity}
+                    for b in (b1, b2)
+                ],
+            }, outfile)
+        self.outfile = open(path, "wb")
+        engine.add_observer(self)
+
+    def on_collision(self, engine, kind):
+        b1, b2 = engine.block1, engine.block2
+        self.buffer[self.count] = (engine.time, KIND_CODES[kind], engine.num_collisions,
+                                   b1.velocity, b2.velocity, b1.x, b2.x)
+        self.count += 1
+        if self.count == len(self.buffer):
+            self.flush()
+
+    def flush(self):
+        self.buffer[:self.count].tofile(self.outfile)
+        self.outfile.flush()
+        self.count = 0
+
+    def close(self):
+        self.flush()
+        self.outfile.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class TraceReplay:
+    """
+        Read-only view of a recorded run, positioned at one collision at a time.
+        block1 and block2 hold the state right after the current collision
+    """
+
+    def __init__(self, path):
+        with open(header_path(path)) as infile:
+            header = json.load(infile)
+        if os.path.getsize(path) == 0:
+            # No collisions recorded (yet), and an empty file cannot be mapped
+            self.records = np.empty(0, dtype=TRACE_DTYPE)
+        else:
+            self.records = np.memmap(path, dtype=TRACE_DTYPE, mode="r")
+        self.left_x = header["leftX"]
+        self.start_time = header["time"]
+        self.start_collisions = header["numCollisions"]
+        self.initial = header["blocks"]
+        self.block1 = Block(**self.initial[0])
+        self.block2 = Block(**self.initial[1])
+        self.position = -1  # Index of the current record, -1 before the first
+        self.time = self.start_time
+        self.num_collisions = self.start_collisions
+
+    def __len__(self):
+        return len(self.records)
+
+    def seek(self, k):
+        """
+            Moves to just after collision #k
+        """
+        self._move_to(k - self.start_collisions - 1)
+        return self
+
+    def _move_to(self, position):
+        position = min(max(position, -1), len(self.records) - 1)
+        if position == self.position:
+            return
+        self.position = position
+        if position < 0:
+            state = self.initial
+            self.block1.x, self.block1.velocity = state[0]["x"], state[0]["velocity"]
+            self.block2.x, self.block2.velocity = state[1]["x"], state[1]["velocity"]
+            self.time, self.num_collisions = self.start_time, self.start_collisions
+        else:
+            record = self.records[position]
+            self.block1.x, self.block1.velocity = float(record["x1"]), float(record["v1"])
+            self.block2.x, self.block2.velocity = float(record["x2"]), float(record["v2"])
+            self.time, self.num_collisions = float(record["time"]), int(record["index"])
+
+    def advance_to(self, t):
+        """
+            Moves to the last collision no later than t
+        """
+        self._move_to(int(np.searchsorted(self.records["time"], t, side="right")) - 1)
+
+    def positions_at(self, t):
+        b1, b2 = self.block1, self.block2
+        return b1.x + b1.velocity * (t - self.time), b2.x + b2.velocity * (t - self.time)
+
+    def is_done(self):
+        return is_done(self.block1.velocity, self.block2.velocity)
+
+
+if __name__ == "__main__":
+    from collision_engine import feynman_engine
+
+    command, path = sys.argv[1], sys.argv[2]
+    if command == "record":
+        exponent = int(sys.argv[3]) if len(sys.argv) > 3 else 3
+        engine = feynman_engine(100**exponent, .01)
+        with TraceRecorder(engine, path):
+            engine.run()
+        print(f"Recorded {engine.num_collisions} collisions to {path}")
+    else:
+        import tkinter as tk
+        from playback import Playback
+
+        replay = TraceReplay(path)
+        if len(sys.argv) > 3:
+            replay.seek(int(sys.argv[3]))
+        root = tk.Tk()
+        root.title("Collision Replay")
+        app = Playback(root, replay)
+        root.mainloop()
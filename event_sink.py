@@ -0,0 +1,98 @@
+"""
+    Streaming event log for the gate model
+
+    GateModel reports what happens through three calls on its event sink:
+    bus_arrival(), seller_visit() once per purchasing group and
+    scanner_visit() once per person scanned. NDJSONSink turns them into the
+    BUS_ARRIVAL, WALK_TO_SELLER, ... SCAN_TICKETS events and writes each as one
+    line of JSON, buffering buffer_size events at a time, so the log takes
+    constant memory however long the run and a crash loses at most one
+    buffer. The first line can hold a header (such as the number of lines)
+    that is not an event.
+
+    event_store.EventStore keeps the same events in memory, in typed columns.
+    Pass event_sink=None to GateModel to skip the event log entirely.
+"""
+
+import json
+
+BUFFER_SIZE = 10_000
+
+
+class NDJSONSink:
+    def __init__(self, path, header=None, buffer_size=BUFFER_SIZE):
+        self.path = path
+        self.buffer_size = buffer_size
+        self.buffer = []
+        self.num_events = 0
+        self.file = open(path, "w")
+        if header is not None:
+            self.file.write(json.dumps(header) + "\n")
+
+    def write(self, event):
+        self.buffer.append(json.dumps(event))
+        self.num_events += 1
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+
+    def bus_arrival(self, time, bus_id, people_created):
+        self.write({
+            "event": "BUS_ARRIVAL",
+            "time": round(time, 2),
+            "busId": bus_id,
+            "peopleCreated": list(people_created)
+        })
+
+    def seller_visit(self, people, seller_line, walk_begin, walk_end, queue_begin, queue_end, sale_begin, sale_end):
+        people = list(people)
+        for event, begin, end in (("WALK_TO_SELLER", walk_begin, walk_end),
+                                  ("WAIT_IN_SELLER_LINE", queue_begin, queue_end),
+                                  ("BUY_TICKETS", sale_begin, sale_end)):
+            self.write({
+                "event": event,
+                "people": people,
+                "sellerLine": seller_line,
+                "time": round(begin, 2),
+                "duration": round(end - begin, 2)
+            })
+
+    def scanner_visit(self, people, person, scanner_line, walk_begin, walk_end, queue_begin, queue_end, scan_begin, scan_end):
+        for event, begin, end in (("WALK_TO_SCANNER", walk_begin, walk_end),
+                                  ("WAIT_IN_SCANNER_LINE", queue_begin, queue_end),
+                                  ("SCAN_TICKETS", scan_begin, scan_end)):
+            self.write({
+                "event": event,
+                "person": person,
+                "scannerLine": scanner_line,
+                "time": round(begin, 2),
+                "duration": round(end - begin, 2)
+            })
+
+    def flush(self):
+        if self.buffer:
+            self.file.write("\n".join(self.buffer) + "\n")
+            self.buffer = []
+        self.file.flush()
+
+    def close(self):
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def read_events(path, header=True):
+    """
+        Yields the events in an NDJSON log one at a time, skipping the header
+        line if there is one
+    """
+    with open(path) as infile:
+        if header:
+            infile.readline()
+        for line in infile:
+            yield json.loads(line)
@@ -0,0 +1,173 @@
+"""
+    Columnar event store for the gate model
+
+    An event sink (see event_sink.py) that keeps the event log in memory as
+    typed columns, one row per event:
+
+        kind        event kind code, an index into EVENT_KINDS (uint8)
+        time        start of the event, unrounded (float64)
+        duration    (float64)
+        line        seller or scanner line #, or the bus id for BUS_ARRIVAL (int32)
+        group       row of the group table (int32)
+        member      position of the person in the group, or WHOLE_GROUP (int16)
+
+    People are never stored per event. Every bus and every group of customers
+    is one row of a side table holding its first person id and its size,
+    since the people in a group are consecutive. The three seller events of a
+    group and its walk to and wait at the scanners point at that row, and only
+    SCAN_TICKETS, which happens to one person at a time, names a member.
+
+    columns() returns the columns as NumPy arrays, so analytics can filter
+    and aggregate without a Python loop over events; iter_events() expands
+    the rows back into the dicts NDJSONSink writes.
+"""
+
+from array import array
+
+import numpy as np
+
+EVENT_KINDS = ["BUS_ARRIVAL", "WALK_TO_SELLER", "WAIT_IN_SELLER_LINE", "BUY_TICKETS",
+               "WALK_TO_SCANNER", "WAIT_IN_SCANNER_LINE", "SCAN_TICKETS"]
+(BUS_ARRIVAL, WALK_TO_SELLER, WAIT_IN_SELLER_LINE, BUY_TICKETS,
+ WALK_TO_SCANNER, WAIT_IN_SCANNER_LINE, SCAN_TICKETS) = range(len(EVENT_KINDS))
+SELLER_KINDS = (WALK_TO_SELLER, WAIT_IN_SELLER_LINE, BUY_TICKETS)
+
+WHOLE_GROUP = -1
+
+
+class EventStore:
+    def __init__(self):
+        self.kind = array("B")
+        self.time = array("d")
+        self.duration = array("d")
+        self.line = array("i")
+        self.group = array("i")
+        self.member = array("h")
+
+        self.group_first = array("q")
+        self.group_size = array("i")
+        # Groups still on their way through the scanners, by (first, last) person
+        self.open_groups = {}
+
+    def __len__(self):
+        return len(self.kind)
+
+    @property
+    def nbytes(self):
+        return sum(column.itemsize * len(column) for column in (
+            self.kind, self.time, self.duration, self.line, self.group, self.member,
+            self.group_first, self.group_size))
+
+    def _add(self, kind, begin, end, line, group, member=WHOLE_GROUP):
+        self.kind.append(kind)
+        self.time.append(begin)
+        self.duration.append(end - begin)
+        self.line.append(line)
+        self.group.append(group)
+        self.member.append(member)
+
+    def _new_group(self, people):
+        self.group_first.append(people[0] if len(people) else 0)
+        self.group_size.append(len(people))
+        return len(self.group_size) - 1
+
+    # -------------------------
+    #  EVENT SINK
+    # -------------------------
+
+    def bus_arrival(self, time, bus_id, people_created):
+        self._add(BUS_ARRIVAL, time, time, bus_id, self._new_group(people_created))
+
+    def seller_visit(self, people, seller_line, walk_begin, walk_end, queue_begin, queue_end, sale_begin, sale_end):
+        group = self._new_group(people)
+        self.open_groups[people[0], people[-1]] = group
+        self._add(WALK_TO_SELLER, walk_begin, walk_end, seller_line, group)
+        self._add(WAIT_IN_SELLER_LINE, queue_begin, queue_end, seller_line, group)
+        self._add(BUY_TICKETS, sale_begin, sale_end, seller_line, group)
+
+    def scanner_visit(self, people, person, scanner_line, walk_begin, walk_end, queue_begin, queue_end, scan_begin, scan_end):
+        key = (people[0], people[-1])
+        member = person - people[0]
+        if member == 0:
+            # The group walks and queues together, so that is stored once
+            group = self.open_groups.get(key)
+            if group is None:
+                group = self.open_groups[key] = self._new_group(people)
+            self._add(WALK_TO_SCANNER, walk_begin, walk_end, scanner_line, group)
+            self._add(WAIT_IN_SCANNER_LINE, queue_begin, queue_end, scanner_line, group)
+        else:
+            group = self.open_groups[key]
+        self._add(SCAN_TICKETS, scan_begin, scan_end, scanner_line, group, member)
+        if person == people[-1]:
+            del self.open_groups[key]
+
+    # -------------------------
+    #  ANALYTICS
+    # -------------------------
+
+    def columns(self):
+        """
+            Copies of the event columns as NumPy arrays, by name
+        """
+        return {
+            "kind": np.array(self.kind, dtype=np.uint8),
+            "time": np.array(self.time, dtype=np.float64),
+            "duration": np.array(self.duration, dtype=np.float64),
+            "line": np.array(self.line, dtype=np.int32),
+            "group": np.array(self.group, dtype=np.int32),
+            "member": np.array(self.member, dtype=np.int16),
+        }
+
+    def groups(self):
+        return {
+            "first": np.array(self.group_first, dtype=np.int64),
+            "size": np.array(self.group_size, dtype=np.int32),
+        }
+
+    def people_per_event(self, columns=None):
+        """
+            How many people each event happened to: the group size, or 1 for an
+            event of a single member
+        """
+        columns = columns or self.columns()
+        sizes = np.array(self.group_size, dtype=np.int32)[columns["group"]]
+        return np.where(columns["member"] == WHOLE_GROUP, sizes, 1)
+
+    def mean_duration_by_line(self, kind, per_person=False):
+        """
+            Mean duration of the events of this kind on every line, as an array
+            indexed by line # - 1. With per_person, group events count once per
+            person in the group
+        """
+        columns = self.columns()
+        selected = columns["kind"] == kind
+        lines = columns["line"][selected].astype(np.int64) - 1
+        weights = self.people_per_event(columns)[selected] if per_person else np.ones(len(lines))
+        num_lines = lines.max() + 1 if len(lines) else 0
+        totals = np.bincount(lines, weights=columns["duration"][selected] * weights, minlength=num_lines)
+        counts = np.bincount(lines, weights=weights, minlength=num_lines)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return totals / counts
+
+    def iter_events(self):
+        """
+            Yields every event as the dict NDJSONSink would have written. Group
+            events at the scanners are expanded to one dict per person, so the
+            order differs from the NDJSON log
+        """
+        for kind, begin, duration, line, group, member in zip(self.kind, self.time, self.duration,
+                                                                self.line, self.group, self.member):
+            first, size = self.group_first[group], self.group_size[group]
+            event = {"event": EVENT_KINDS[kind]}
+            if kind == BUS_ARRIVAL:
+                event.update({"time": round(begin, 2), "busId": line, "peopleCreated": list(range(first, first + size))})
+                yield event
+            elif kind in SELLER_KINDS:
+                event.update({"people": list(range(first, first + size)), "sellerLine": line,
+                              "time": round(begin, 2), "duration": round(duration, 2)})
+                yield event
+            else:
+                people = range(first, first + size) if member == WHOLE_GROUP else (first + member,)
+                for person in people:
+                    yield {**event, "person": person, "scannerLine": line,
+                           "time": round(begin, 2), "duration": round(duration, 2)}
@@ -0,0 +1,162 @@
+"""
+    Fast collision count for the Feynman block problem
+
+    Scaling the velocities to x = sqrt(m1) * v1 and y = sqrt(m2) * v2 turns the
+    kinetic energy into x**2 + y**2, so the state moves on a circle. A block
+    collision (the update in rect_collision) reflects the point across the line
+    through (sqrt(m1), sqrt(m2)), and a wall collision reflects it across the
+    y axis. Each block/wall pair is therefore a rotation by 2 * theta with
+    theta = atan(sqrt(m1 / m2)), and the number of collisions and the final
+    velocities follow from the starting angle, without stepping through them.
+
+    The float path is fine up to mass ratios of about 100**7. For anything
+    larger pass exact=True, which does the same computation with the decimal
+    module at enough digits that rounding can never move the count.
+"""
+
+import math
+from decimal import Decimal, localcontext
+
+GUARD_DIGITS = 10
+
+
+def fast_count(m1, m2, v1, v2, exact=False, digits=None):
+    """
+        Returns a tuple of (collisions, v1, v2) for block 1 (mass m1, between the
+        wall and block 2) and block 2 (mass m2). When both blocks start moving
+        left with block 2 closing in, the blocks are assumed to meet before
+        block 1 reaches the wall, which always holds for the feynman.py layout.
+
+        With exact=True the velocities are returned as Decimals, computed with
+        digits significant digits (by default enough for the mass ratio).
+    """
+    if not exact:
+        return _count(m1, m2, v1, v2, math)
+
+    m1, m2, v1, v2 = Decimal(m1), Decimal(m2), Decimal(v1), Decimal(v2)
+    if digits is None:
+        digits = 40 + len(str(int(max(m1, m2) / min(m1, m2))))
+    with localcontext() as ctx:
+        ctx.prec = digits + GUARD_DIGITS
+        collisions, v1, v2 = _count(m1, m2, v1, v2, _DecimalMath(ctx.prec))
+        # Drop the guard digits, rounding to digits rather than the default context
+        ctx.prec = digits
+        return collisions, +v1, +v2
+
+
+def _count(m1, m2, v1, v2, lib):
+    collisions = 0
+    if v1 <= v2 and v1 < 0:
+        # Block 1 is heading for the wall and block 2 is not catching up with it
+        v1 = -v1
+        collisions += 1
+    if v1 <= v2:
+        return collisions, v1, v2
+
+    sqrt_m1, sqrt_m2 = lib.sqrt(m1), lib.sqrt(m2)
+    theta = lib.atan(sqrt_m1 / sqrt_m2)
+    alpha = lib.pi / 2 - theta
+    radius = lib.sqrt(m1 * v1 * v1 + m2 * v2 * v2)
+
+    # phi lies in (alpha - pi, alpha): below the line of block collisions
+    phi = lib.atan2(sqrt_m2 * v2, sqrt_m1 * v1)
+    if phi >= alpha:
+        phi -= 2 * lib.pi
+
+    # Pair k (k = 0, 1, ...) starts at phi + 2k * theta. It has a block collision
+    # while that angle is below alpha, and a wall collision after it while the
+    # angle is also below alpha - theta
+    block_collisions = int(lib.ceil((alpha - phi) / (2 * theta)))
+    wall_collisions = max(int(lib.ceil((alpha - theta - phi) / (2 * theta))), 0)
+    collisions += block_collisions + wall_collisions
+
+    if wall_collisions == block_collisions:
+        phi = phi + 2 * block_collisions * theta
+    else:
+        phi = 2 * alpha - (phi + 2 * (block_collisions - 1) * theta)
+
+    return collisions, radius * lib.cos(phi) / sqrt_m1, radius * lib.sin(phi) / sqrt_m2
+
+
+class _DecimalMath:
+    """
+        The handful of math functions _count needs, for Decimals in the current
+        context
+    """
+
+    def __init__(self, prec):
+        self.prec = prec
+        self.pi = 16 * self._atan_series(Decimal(1) / 5) - 4 * self._atan_series(Decimal(1) / 239)
+
+    @staticmethod
+    def sqrt(x):
+        return x.sqrt()
+
+    @staticmethod
+    def ceil(x):
+        return x.to_integral_value(rounding="ROUND_CEILING")
+
+    def _atan_series(self, x):
+        # Converges quickly for |x| <= 0.2
+        eps = Decimal(10) ** -(self.prec + 2)
+        x2 = x * x
+        term, total, n = x, x, 1
+        while abs(term) > eps:
+            term *= -x2
+            n += 2
+            total += term / n
+        return total
+
+    def atan(self, x):
+        if x < 0:
+            return -self.atan(-x)
+        if x > 1:
+            return self.pi / 2 - self.atan(1 / x)
+
+        # Halve the angle until the series converges quickly
+        halvings = 0
+        while x > Decimal("0.2"):
+            x = x / (1 + (1 + x * x).sqrt())
+            halvings += 1
+        return self._atan_series(x) * (2 ** halvings)
+
+    def atan2(self, y, x):
+        if x > 0:
+            return self.atan(y / x)
+        if x < 0:
+            return self.atan(y / x) + (self.pi if y >= 0 else -self.pi)
+        if y > 0:
+            return self.pi / 2
+        if y < 0:
+            return -self.pi / 2
+        return Decimal(0)
+
+    def _sin_cos(self, x):
+        x = x % (2 * self.pi)
+        eps = Decimal(10) ** -(self.prec + 2)
+        sin, cos = Decimal(0), Decimal(0)
+        term, n = Decimal(1), 0
+        while n < 2 or abs(term) > eps:
+            if n % 4 == 0:
+                cos += term
+            elif n % 4 == 1:
+                sin += term
+            elif n % 4 == 2:
+                cos -= term
+            else:
+                sin -= term
+            n += 1
+            term = term * x / n
+        return sin, cos
+
+    def sin(self, x):
+        return self._sin_cos(x)[0]
+
+    def cos(self, x):
+        return self._sin_cos(x)[1]
+
+
+if __name__ == "__main__":
+    for k in range(1, 21):
+        collisions, v1, v2 = fast_count(1, 100**k, 0, -1, exact=True)
+        print(f"Mass ratio 100**{k}: {collisions} collisions")
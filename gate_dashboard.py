@@ -0,0 +1,171 @@
+"""
+    Incremental matplotlib dashboard for the gate model
+
+    The three plots under the queues in og_simulation.py: average seller and
+    scanner wait per minute, and arrivals per minute. The lines and bars are
+    created once and only redone from the earliest minute that changed since
+    the last frame (a wait is registered when it ends, after its minute may
+    have closed, so that can be a minute or two back). Frames
+    redraw just those artists over a cached background (blitting), and bars
+    of minutes that are over are drawn into the background once, so a frame
+    costs the same at the end of a run as at the start. The axes are only
+    redrawn in full when the data outgrows their limits, which double in time
+    and grow by half in value.
+
+    Nothing in here decides how often to draw: og_simulation.py caps frames
+    by wall-clock time, however fast simulated time advances.
+"""
+
+import bisect
+import math
+
+INITIAL_MINUTES = 60
+
+
+class WaitSeries:
+    """
+        One step line of per-window mean waits from a wait_stats.WaitStats.
+        Every frame rebuilds the line from the earliest window that changed
+        since the last one, usually the last window or two
+    """
+
+    def __init__(self, axes, stats):
+        self.axes = axes
+        self.stats = stats
+        self.xs = []
+        self.ys = []
+        self.peak = 0
+        self.line, = axes.plot([], [], drawstyle="steps-pre", animated=True)
+
+    def update(self, now):
+        first = self.stats.take_changed()
+        if first is not None:
+            i = bisect.bisect_left(self.xs, first * self.stats.window)
+            del self.xs[i:], self.ys[i:]
+            for w in range(first, self.stats.last_window + 1):
+                stats = self.stats.windows.get(w)
+                if stats is None:
+                    continue
+                self.xs.append(w * self.stats.window)
+                self.ys.append(stats.mean)
+                # A window's mean can fall as it fills, but the peak only needs to cover the axis limits
+                self.peak = max(self.peak, stats.mean)
+            self.line.set_data(self.xs, self.ys)
+        return self.peak
+
+    def settle(self):
+        return []
+
+    def artists(self):
+        return [self.line]
+
+
+class ArrivalBars:
+    """
+        One bar per minute of GateModel.arrivals. Bars of minutes that are over
+        are settled into the background, so a frame only draws the latest one
+    """
+
+    def __init__(self, axes, arrivals):
+        self.axes = axes
+        self.arrivals = arrivals
+        self.active = {}
+        self.settled = []
+        self.current = 0
+        self.peak = 0
+
+    def update(self, now):
+        last = int(now)
+        for minute in range(self.current, last + 1):
+            if minute not in self.arrivals:  # Indexing the defaultdict would add the minute
+                continue
+            count = self.arrivals[minute]
+            bar = self.active.get(minute)
+            if bar is None:
+                bar = self.active[minute] = self.axes.bar([minute], [count], color="C0")[0]
+                bar.set_animated(True)
+            else:
+                bar.set_height(count)
+            self.peak = max(self.peak, count)
+        for minute in [m for m in self.active if m < last]:
+            bar = self.active.pop(minute)
+            bar.set_animated(False)
+            self.settled.append(bar)
+        self.current = last
+        return self.peak
+
+    def settle(self):
+        settled, self.settled = self.settled, []
+        return settled
+
+    def artists(self):
+        return list(self.active.values())
+
+
+class Dashboard:
+    def __init__(self, figure_canvas, seller_axes, scanner_axes, arrival_axes, model):
+        self.figure_canvas = figure_canvas
+        self.model = model
+
+        seller_axes.set_xlabel("Time")
+        seller_axes.set_ylabel("Avg. Seller Wait (minutes)")
+        scanner_axes.set_xlabel("Time")
+        scanner_axes.set_ylabel("Avg. Scanner Wait (minutes)")
+        arrival_axes.set_xlabel("Time")
+        arrival_axes.set_ylabel("Arrivals")
+
+        self.series = [
+            WaitSeries(seller_axes, model.seller_stats),
+            WaitSeries(scanner_axes, model.scan_stats),
+            ArrivalBars(arrival_axes, model.arrivals),
+        ]
+        self.minutes = INITIAL_MINUTES
+        for series in self.series:
+            series.axes.set_xlim(0, self.minutes)
+            series.axes.set_ylim(0, 1)
+
+        self.backgrounds = None
+        figure_canvas.mpl_connect("draw_event", self.on_draw)
+        figure_canvas.draw()
+
+    def on_draw(self, event):
+        """
+            After every full redraw, which leaves out the animated artists,
+            keep the empty axes as the background and draw the artists over it
+        """
+        self.backgrounds = [self.figure_canvas.copy_from_bbox(series.axes.bbox) for series in self.series]
+        for series in self.series:
+            for artist in series.artists():
+                series.axes.draw_artist(artist)
+
+    def update(self, now):
+        rescale = False
+        if now > self.minutes:
+            self.minutes *= 2 ** math.ceil(math.log2(now / self.minutes))
+            for series in self.series:
+                series.axes.set_xlim(0, self.minutes)
+            rescale = True
+
+        for series in self.series:
+            peak = series.update(now)
+            if peak > series.axes.get_ylim()[1]:
+                series.axes.set_ylim(0, peak * 1.5)
+                rescale = True
+
+        if rescale or self.backgrounds is None:
+            # Settled artists are no longer animated, so the full redraw draws them
+            for series in self.series:
+                series.settle()
+            self.figure_canvas.draw()
+            return
+
+        for i, series in enumerate(self.series):
+            self.figure_canvas.restore_region(self.backgrounds[i])
+            settled = series.settle()
+            if settled:
+                for artist in settled:
+                    series.axes.draw_artist(artist)
+                self.backgrounds[i] = self.figure_canvas.copy_from_bbox(series.axes.bbox)
+            for artist in series.artists():
+                series.axes.draw_artist(artist)
+            self.figure_canvas.blit(series.axes.bbox)
@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+    Simulation core of the gate model
+
+    Buses arrive, their passengers either buy tickets from a seller or walk
+    straight to the scanners, and every wait is recorded. Nothing in here
+    imports Tk or matplotlib: anything that wants to follow a run (such as the
+    UI in og_simulation.py) subclasses GateObserver and is passed to GateModel.
+
+    Headless examples, one simulated day, then a week of buses whose rate
+    follows DAILY_PROFILE, then a recorded log of arrivals (see
+    arrival_sources.py for the format):
+        python gate_model.py --until 1440
+        python gate_model.py --until 10080 --arrivals synthetic
+        python gate_model.py --until 1440 --trace turnstiles.csv
+"""
+
+import argparse
+import random
+import time
+from collections import defaultdict
+
+import simpy
+
+from arrival_sources import FLAT, poisson_arrivals, scheduled_arrivals, trace_arrivals
+from event_sink import NDJSONSink
+from line_selection import SHORTEST, POLICIES, LineGroup
+from random_streams import BLOCK_SIZE, UniformStream, VariateStream, group_sizes, normal_durations, spawn_generators
+from wait_stats import WaitStats
+
+# -------------------------
+#  CONFIGURATION
+# -------------------------
+
+BUS_ARRIVAL_MEAN = 3
+BUS_OCCUPANCY_MEAN = 100
+BUS_OCCUPANCY_STD = 30
+
+PURCHASE_RATIO_MEAN = 0.4
+PURCHASE_GROUP_SIZE_MEAN = 2.25
+PURCHASE_GROUP_SIZE_STD = 0.50
+
+TIME_TO_WALK_TO_SELLERS_MEAN = 1
+TIME_TO_WALK_TO_SELLERS_STD = 0.25
+TIME_TO_WALK_TO_SCANNERS_MEAN = 0.5
+TIME_TO_WALK_TO_SCANNERS_STD = 0.1
+
+SELLER_LINES = 6
+SELLERS_PER_LINE = 1
+SELLER_MEAN = 1
+SELLER_STD = 0.2
+
+SCANNER_LINES = 4
+SCANNERS_PER_LINE = 1
+SCANNER_MEAN = 1 / 20
+SCANNER_STD = 0.01
+
+SEED = 42
+
+# Bus rate in each hour of the day, relative to one bus every BUS_ARRIVAL_MEAN
+# minutes, for synthetic arrivals; minute 0 of a run is DAY_START
+DAILY_PROFILE = (0, 0, 0, 0, 0, 0, 0.2, 0.6,
+                 1, 1, 0.8, 0.5, 0.4, 0.4, 0.3, 0.3,
+                 0.2, 0.1, 0, 0, 0, 0, 0, 0)
+DAY_START = 8 * 60
+
+# Let's pre-generate all the bus arrival times and their occupancies so that even if we
+# change the configuration, we'll have consistent arrivals
+random.seed(SEED)
+ARRIVALS = [ random.expovariate(1 / BUS_ARRIVAL_MEAN) for _ in range(40) ]
+ON_BOARD = [ int(random.gauss(BUS_OCCUPANCY_MEAN, BUS_OCCUPANCY_STD)) for _ in range(40) ]
+
+
+# Spawned in this order from the model's seed: new streams go at the end
+STREAMS = ["group_size", "purchase", "walk_to_sellers", "walk_past_sellers", "walk_to_scanners",
+           "seller_service", "scanner_service", "line_choice"]
+
+
+class RandomStreams:
+    """
+        An independent, block-drawn stream for every random quantity in the
+        model (see random_streams.py), so that runs with the same seed share
+        their random numbers whatever the staffing
+    """
+
+    def __init__(self, seed, block_size=BLOCK_SIZE):
+        g = spawn_generators(seed, STREAMS)
+        self.group_size = VariateStream(group_sizes(g["group_size"], PURCHASE_GROUP_SIZE_MEAN, PURCHASE_GROUP_SIZE_STD), block_size)
+        self.purchase = UniformStream(g["purchase"], block_size)
+        self.walk_to_sellers = VariateStream(normal_durations(g["walk_to_sellers"], TIME_TO_WALK_TO_SELLERS_MEAN, TIME_TO_WALK_TO_SELLERS_STD), block_size)
+        # Groups that need no tickets walk past the sellers straight to the scanners
+        self.walk_past_sellers = VariateStream(normal_durations(g["walk_past_sellers"],
+                                                                TIME_TO_WALK_TO_SELLERS_MEAN + TIME_TO_WALK_TO_SCANNERS_MEAN,
+                                                                TIME_TO_WALK_TO_SELLERS_STD + TIME_TO_WALK_TO_SCANNERS_STD), block_size)
+        self.walk_to_scanners = VariateStream(normal_durations(g["walk_to_scanners"], TIME_TO_WALK_TO_SCANNERS_MEAN, TIME_TO_WALK_TO_SCANNERS_STD), block_size)
+        self.seller_service = VariateStream(normal_durations(g["seller_service"], SELLER_MEAN, SELLER_STD), block_size)
+        self.scanner_service = VariateStream(normal_durations(g["scanner_service"], SCANNER_MEAN, SCANNER_STD), block_size)
+        self.line_choice = UniformStream(g["line_choice"], block_size)
+
+
+def bus_occupancy(rng):
+    return max(int(rng.gauss(BUS_OCCUPANCY_MEAN, BUS_OCCUPANCY_STD)), 0)
+
+
+def bus_arrivals(rng, profile=FLAT, start=DAY_START):
+    """
+        Endless synthetic buses drawn from rng (see arrival_sources.py), one
+        every BUS_ARRIVAL_MEAN minutes on average at a profile rate of 1
+    """
+    return poisson_arrivals(rng, BUS_ARRIVAL_MEAN, bus_occupancy, profile, start)
+
+
+def avg_wait(stats):
+    return round(stats.mean, 1)
+
+
+class GateObserver:
+    """
+        Hooks called by GateModel as the simulation runs. Every hook does nothing
+        by default, so observers only override what they need
+    """
+
+    def next_bus(self, minutes):
+        pass
+
+    def bus_arrived(self, people):
+        pass
+
+    def joined_seller_line(self, line):
+        pass
+
+    def left_seller_line(self, line):
+        pass
+
+    def joined_scanner_line(self, line, people):
+        pass
+
+    def left_scanner_line(self, line, people):
+        pass
+
+    def tick(self, now):
+        """
+            Called every tick_interval simulated minutes, if the model has one
+        """
+        pass
+
+
+class GateModel:
+    def __init__(self, seller_lines=SELLER_LINES, sellers_per_line=SELLERS_PER_LINE,
+                 scanner_lines=SCANNER_LINES, scanners_per_line=SCANNERS_PER_LINE,
+                 arrivals=None, on_board=None, observers=(), tick_interval=None, verbose=False, seed=SEED,
+                 policy=SHORTEST, event_sink=None, arrival_source=None):
+        self.num_seller_lines = seller_lines
+        self.num_scanner_lines = scanner_lines
+        self.observers = list(observers)
+        self.tick_interval = tick_interval
+        self.verbose = verbose
+        self.event_sink = event_sink  # event_sink.NDJSONSink, event_store.EventStore, or None to skip the log
+        self.streams = RandomStreams(seed)
+
+        # (gap, people on board) of every bus, taken one at a time as the buses arrive
+        if arrival_source is None:
+            arrival_source = scheduled_arrivals(ARRIVALS if arrivals is None else arrivals,
+                                                ON_BOARD if on_board is None else on_board)
+        self.arrival_source = iter(arrival_source)
+
+        # Analytics
+        self.arrivals = defaultdict(lambda: 0)
+        self.seller_stats = WaitStats()
+        self.scan_stats = WaitStats()
+
+        self.env = simpy.Environment()
+        self.seller_lines = LineGroup(self.env, seller_lines, sellers_per_line, policy, self.streams.line_choice)
+        self.scanner_lines = LineGroup(self.env, scanner_lines, scanners_per_line, policy, self.streams.line_choice)
+
+        self.env.process(self.bus_arrival())
+        if tick_interval is not None:
+            self.env.process(self.create_clock())
+
+    def add_observer(self, observer):
+        self.observers.append(observer)
+
+    def run(self, until):
+        self.env.run(until = until)
+        return self
+
+    # -------------------------
+    #  ANALYTICS
+    # -------------------------
+
+    def register_arrivals(self, time, num):
+        self.arrivals[int(time)] += num
+
+    def register_seller_wait(self, time, wait, line=None):
+        self.seller_stats.add(time, wait, line)
+
+    def register_scan_wait(self, time, wait, line=None, count=1):
+        self.scan_stats.add(time, wait, line, count)
+
+    def register_bus_arrival(self, time, bus_id, people_created):
+        self.register_arrivals(time, len(people_created))
+        if self.verbose:
+            print(f"Bus #{bus_id} arrived at {time} with {len(people_created)} people")
+        if self.event_sink is not None:
+            self.event_sink.bus_arrival(time, bus_id, people_created)
+
+    def register_group_moving_from_bus_to_seller(self, people, walk_begin, walk_end, seller_line, queue_begin, queue_end, sale_begin, sale_end):
+        wait = queue_end - queue_begin
+        service_time = sale_end - sale_begin
+        self.register_seller_wait(queue_end, wait, seller_line)
+        if self.verbose:
+            print(f"Purchasing group of {len(people)} waited {wait} minutes in Line {seller_line}, needed {service_time} minutes to complete")
+        if self.event_sink is not None:
+            self.event_sink.seller_visit(people, seller_line, walk_begin, walk_end, queue_begin, queue_end, sale_begin, sale_end)
+
+    def register_visitor_moving_to_scanner(self, people, person, walk_begin, walk_end, scanner_line, queue_begin, queue_end, scan_begin, scan_end):
+        wait = queue_end - queue_begin
+        service_time = scan_end - scan_begin
+        if person == people[0]:
+            # The whole group waited together
+            self.register_scan_wait(queue_end, wait, scanner_line, len(people))
+        if self.verbose:
+            print(f"Scanning customer waited {wait} minutes in Line {scanner_line}, needed {service_time} minutes to complete")
+        if self.event_sink is not None:
+            self.event_sink.scanner_visit(people, person, scanner_line, walk_begin, walk_end, queue_begin, queue_end, scan_begin, scan_end)
+
+    # -------------------------
+    #  SIMULATION
+    # -------------------------
+
+    def create_clock(self):
+        """
+            This generator is meant to be used as a SimPy event to let the
+            observers update the clock and the data in the UI
+        """
+        while True:
+            yield self.env.timeout(self.tick_interval)
+            for observer in self.observers:
+                observer.tick(self.env.now)
+
+    def bus_arrival(self):
+        """
+            Simulate a bus arriving every BUS_ARRIVAL_MEAN minutes with
+            BUS_OCCUPANCY_MEAN people on board
+
+            This is the top-level SimPy event for the simulation: all other events
+            originate from a bus arriving. It ends when the arrival source runs
+            out, if it ever does
+        """
+        env = self.env
+        # Note that these unique IDs for busses and people are not required, but are included for eventual visualizations
+        next_bus_id = 0
+        next_person_id = 0
+        for next_bus, on_board in self.arrival_source:
+            # Wait for the bus
+            for observer in self.observers:
+                observer.next_bus(next_bus)
+            yield env.timeout(next_bus)
+            for observer in self.observers:
+                observer.bus_arrived(on_board)
+
+            # register_bus_arrival() below is for reporting purposes only
+            people_ids = range(next_person_id, next_person_id + on_board)
+            self.register_bus_arrival(env.now, next_bus_id, people_ids)
+            next_person_id += on_board
+            next_bus_id += 1
+
+            while len(people_ids) > 0:
+                remaining = len(people_ids)
+                group_size = min(self.streams.group_size.next(), remaining)
+                people_processed = people_ids[-group_size:] # Grab the last `group_size` elements
+                people_ids = people_ids[:-group_size] # Reset people_ids to only those remaining
+
+                # Randomly determine if this group is going to the sellers or straight to the scanners
+                if self.streams.purchase.next() > PURCHASE_RATIO_MEAN:
+                    env.process(self.scanning_customer(people_processed, self.streams.walk_past_sellers))
+                else:
+                    env.process(self.purchasing_customer(people_processed))
+
+    def purchasing_customer(self, people_processed):
+        env = self.env
+        walk_begin = env.now
+        yield env.timeout(self.streams.walk_to_sellers.next())
+        walk_end = env.now
+
+        queue_begin = env.now
+        seller_line = self.seller_lines.join()
+        with seller_line[0].request() as req:
+            # Wait in line
+            for observer in self.observers:
+                observer.joined_seller_line(seller_line[1])
+            yield req
+            for observer in self.observers:
+                observer.left_seller_line(seller_line[1])
+            queue_end = env.now
+
+            # Buy tickets
+            sale_begin = env.now
+            yield env.timeout(self.streams.seller_service.next())
+            sale_end = env.now
+
+            self.register_group_moving_from_bus_to_seller(people_processed, walk_begin, walk_end, seller_line[1], queue_begin, queue_end, sale_begin, sale_end)
+
+            env.process(self.scanning_customer(people_processed, self.streams.walk_to_scanners))
+        self.seller_lines.leave(seller_line[1])
+
+    def scanning_customer(self, people_processed, walk):
+        env = self.env
+        # Walk to the seller
+        walk_begin = env.now
+        yield env.timeout(walk.next())
+        walk_end = env.now
+
+        # The visitor picks a line by the model's policy, the shortest one by default
+        queue_begin = env.now
+        scanner_line = self.scanner_lines.join()
+        with scanner_line[0].request() as req:
+            # Wait in line
+            for observer in self.observers:
+                observer.joined_scanner_line(scanner_line[1], len(people_processed))
+            yield req
+            for observer in self.observers:
+                observer.left_scanner_line(scanner_line[1], len(people_processed))
+            queue_end = env.now
+
+            # Scan each person's tickets
+            for person in people_processed:
+                scan_begin = env.now
+                yield env.timeout(self.streams.scanner_service.next()) # Scan their ticket
+                scan_end = env.now
+                self.register_visitor_moving_to_scanner(people_processed, person, walk_begin, walk_end, scanner_line[1], queue_begin, queue_end, scan_begin, scan_end)
+        self.scanner_lines.leave(scanner_line[1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--until", type=float, default=200, help="simulated minutes to run")
+    parser.add_argument("--verbose", action="store_true", help="print every group as it is served")
+    parser.add_argument("--policy", choices=POLICIES, default=SHORTEST, help="how customers pick a line")
+    parser.add_argument("--events", default=None, help="stream the event log to this NDJSON file")
+    parser.add_argument("--arrivals", choices=["schedule", "synthetic"], default="schedule",
+                        help="the 40 pre-drawn buses, or endless buses following DAILY_PROFILE")
+    parser.add_argument("--trace", default=None, help="replay the arrivals recorded in this file instead")
+    args = parser.parse_args()
+
+    source = None
+    if args.trace:
+        source = trace_arrivals(args.trace)
+    elif args.arrivals == "synthetic":
+        source = bus_arrivals(random.Random(SEED), DAILY_PROFILE)
+
+    sink = None
+    if args.events:
+        sink = NDJSONSink(args.events, header={"sellerLines": SELLER_LINES, "scannerLines": SCANNER_LINES})
+    start = time.perf_counter()
+    try:
+        model = GateModel(verbose=args.verbose, policy=args.policy, event_sink=sink,
+                          arrival_source=source).run(args.until)
+    finally:
+        if sink is not None:
+            sink.close()
+    elapsed = time.perf_counter() - start
+
+    print(f"Simulated {args.until} minutes in {round(elapsed, 2)}s: {sum(model.arrivals.values())} arrivals, "
+          f"avg. seller wait {avg_wait(model.seller_stats)}m, avg. scanner wait {avg_wait(model.scan_stats)}m, "
+          f"p95 {round(model.seller_stats.quantile(0.95), 1)}m / {round(model.scan_stats.quantile(0.95), 1)}m")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+    Line selection for the gate model
+
+    A LineGroup is a row of SimPy resources (seller or scanner lines) plus a
+    policy that picks the line each arriving customer joins:
+
+        shortest    the line with the fewest customers, ties broken at random
+        random-d    the shortest of d lines picked at random ("power of d choices")
+        round-robin every line in turn, whatever its length
+
+    Customers are counted from joining a line until they release it, i.e.
+    waiting plus in service. With the same capacity on every line this orders
+    the lines exactly like their queue lengths once all servers are busy, and
+    sends customers to idle servers first otherwise.
+
+    ShortestLine keeps the lines in buckets by customer count, with a pointer
+    to the lowest non-empty bucket. Counts only ever change by one, so joining,
+    leaving and picking are all O(1), however many lines there are.
+"""
+
+import random
+
+import simpy
+
+SHORTEST = "shortest"
+RANDOM_D = "random-d"
+ROUND_ROBIN = "round-robin"
+POLICIES = [SHORTEST, RANDOM_D, ROUND_ROBIN]
+
+
+class ShortestLine:
+    def __init__(self, num_lines, rng=random):
+        self.rng = rng
+        self.loads = [0] * num_lines
+        self.buckets = {0: list(range(num_lines))}
+        self.slots = list(range(num_lines))  # Position of each line in its bucket
+        self.min_load = 0
+
+    def _move(self, i, load):
+        bucket = self.buckets[self.loads[i]]
+        last = bucket.pop()
+        if last != i:
+            bucket[self.slots[i]] = last
+            self.slots[last] = self.slots[i]
+        if not bucket:
+            del self.buckets[self.loads[i]]
+
+        self.loads[i] = load
+        bucket = self.buckets.setdefault(load, [])
+        self.slots[i] = len(bucket)
+        bucket.append(i)
+
+    def joined(self, i):
+        self._move(i, self.loads[i] + 1)
+        if self.min_load not in self.buckets:
+            self.min_load += 1
+
+    def left(self, i):
+        self._move(i, self.loads[i] - 1)
+        if self.loads[i] < self.min_load:
+            self.min_load = self.loads[i]
+
+    def pick(self):
+        bucket = self.buckets[self.min_load]
+        return bucket[self.rng.randrange(len(bucket))]
+
+
+class ShortestOfD:
+    def __init__(self, num_lines, rng=random, d=2):
+        self.rng = rng
+        self.loads = [0] * num_lines
+        self.d = min(d, num_lines)
+
+    def joined(self, i):
+        self.loads[i] += 1
+
+    def left(self, i):
+        self.loads[i] -= 1
+
+    def pick(self):
+        # rng.sample returns the lines in random order, so min() breaks ties at random
+        return min(self.rng.sample(range(len(self.loads)), self.d), key=self.loads.__getitem__)
+
+
+class RoundRobin:
+    def __init__(self, num_lines, rng=random):
+        self.loads = [0] * num_lines
+        self.next_line = 0
+
+    def joined(self, i):
+        self.loads[i] += 1
+
+    def left(self, i):
+        self.loads[i] -= 1
+
+    def pick(self):
+        i = self.next_line
+        self.next_line = (i + 1) % len(self.loads)
+        return i
+
+
+def make_policy(policy, num_lines, rng=random, d=2):
+    if policy == SHORTEST:
+        return ShortestLine(num_lines, rng)
+    if policy == RANDOM_D:
+        return ShortestOfD(num_lines, rng, d)
+    if policy == ROUND_ROBIN:
+        return RoundRobin(num_lines, rng)
+    raise ValueError(f"Unknown line selection policy {policy!r}, expected one of {POLICIES}")
+
+
+class LineGroup:
+    """
+        Lines with capacity servers each. Customers call join() to be told which
+        line to queue in, and leave() once they release it
+    """
+
+    def __init__(self, env, num_lines, capacity, policy=SHORTEST, rng=random, d=2):
+        self.lines = [ simpy.Resource(env, capacity = capacity) for _ in range(num_lines) ]
+        self.policy = make_policy(policy, num_lines, rng, d)
+
+    def __len__(self):
+        return len(self.lines)
+
+    def __getitem__(self, i):
+        return self.lines[i]
+
+    def join(self):
+        """
+            Returns a tuple of the line to queue in (a SimPy resource) and its
+            line # (1-indexed)
+        """
+        i = self.policy.pick()
+        self.policy.joined(i)
+        return (self.lines[i], i + 1)
+
+    def leave(self, line_number):
+        self.policy.left(line_number - 1)
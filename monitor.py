@@ -0,0 +1,106 @@
+"""
+    Conservation-law monitor for the block simulations
+
+    Kinetic energy is conserved by every collision, and so is momentum once the
+    impulse handed out by the walls (tracked by the simulations as
+    wall_impulse) is accounted for. ConservationMonitor samples both every N
+    collisions or steps and compares them with the values it started from, so
+    floating-point drift in long runs shows up without re-running them at
+    higher precision.
+
+    It works with CollisionEngine, StepSimulation and NBlockSimulation.
+"""
+
+import logging
+import math
+
+SAMPLE_EVERY = 10_000
+TOLERANCE = 1e-9
+
+logger = logging.getLogger(__name__)
+
+
+class ConservationError(Exception):
+    pass
+
+
+def kinetic_energy(blocks):
+    return 0.5 * math.fsum(b.mass * b.velocity * b.velocity for b in blocks)
+
+
+def momentum(blocks):
+    return math.fsum(b.mass * b.velocity for b in blocks)
+
+
+class ConservationMonitor:
+    """
+        Checks relative energy and momentum drift every sample_every calls to
+        tick(). Momentum drift is relative to sqrt(2 * M * E), the momentum the
+        whole system would have with all of its energy in one direction, since
+        the momentum itself can be zero.
+
+        When either drift passes tolerance, a ConservationError is raised, or,
+        with raise_errors=False, a warning is logged
+    """
+
+    def __init__(self, simulation, sample_every=SAMPLE_EVERY, tolerance=TOLERANCE, raise_errors=True):
+        self.simulation = simulation
+        self.sample_every = sample_every
+        self.tolerance = tolerance
+        self.raise_errors = raise_errors
+        self.countdown = sample_every
+
+        blocks = simulation.blocks
+        self.initial_energy = kinetic_energy(blocks)
+        self.initial_momentum = momentum(blocks) - simulation.wall_impulse
+        self.momentum_scale = math.sqrt(2 * sum(b.mass for b in blocks) * self.initial_energy)
+        self.energy_drift = 0.0
+        self.momentum_drift = 0.0
+
+    def tick(self):
+        self.countdown -= 1
+        if self.countdown > 0:
+            return
+        self.countdown = self.sample_every
+        self.check()
+
+    def on_collision(self, engine, kind):
+        self.tick()
+
+    def check(self):
+        """
+            Measures the drift now. Returns True if it is within tolerance
+        """
+        blocks = self.simulation.blocks
+        energy = kinetic_energy(blocks)
+        expected_momentum = self.initial_momentum + self.simulation.wall_impulse
+
+        if self.initial_energy > 0:
+            self.energy_drift = abs(energy - self.initial_energy) / self.initial_energy
+        if self.momentum_scale > 0:
+            self.momentum_drift = abs(momentum(blocks) - expected_momentum) / self.momentum_scale
+
+        if self.energy_drift <= self.tolerance and self.momentum_drift <= self.tolerance:
+            return True
+
+        message = (f"Conservation drift after {self.simulation.num_collisions} collisions: "
+                   f"energy {self.energy_drift:.3e}, momentum {self.momentum_drift:.3e} "
+                   f"(tolerance {self.tolerance:.1e})")
+        if self.raise_errors:
+            raise ConservationError(message)
+        logger.warning(message)
+        return False
+
+
+def run_monitored(simulation, monitor):
+    """
+        Runs an event-driven simulation to the end in batches of
+        monitor.sample_every collisions, checking for drift between batches so
+        that the collisions themselves pay nothing for the monitoring
+    """
+    while True:
+        before = simulation.num_collisions
+        simulation.run(max_collisions=monitor.sample_every)
+        monitor.check()
+        if simulation.num_collisions - before < monitor.sample_every:
+            return simulation
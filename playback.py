@@ -0,0 +1,103 @@
+"""
+    Fixed frame-rate playback of the block problem
+
+    Between collisions the blocks move in straight lines, so the trajectory of
+    a CollisionEngine is piecewise linear and can be sampled at any time. Every
+    frame advances simulated time by time_warp / FPS, resolves the collisions in
+    between, and draws the blocks where they are at that instant. A frame costs
+    the same to draw whether it spans no collision or thousands of them, and the
+    collision counter stays exact.
+
+    Press + / - to double or halve the time warp.
+"""
+
+import sys
+import time
+import tkinter as tk
+
+from block_view import MovingRectangle, Track, Viewport
+from collision_engine import Block, feynman_engine
+
+FPS = 30
+TIME_WARP = 1000  # Simulated time units per second; feynman.py moves about one unit per frame
+
+WIDTH = 2000
+HEIGHT = 1500
+
+
+class Playback:
+    def __init__(self, master, engine, time_warp=TIME_WARP, fps=FPS, width=WIDTH, height=HEIGHT):
+        self.master = master
+        self.engine = engine
+        self.time_warp = time_warp
+        self.fps = fps
+        self.width = width
+        self.height = height
+        self.viewport = Viewport(width)
+
+        self.canvas = tk.Canvas(master, width=width, height=height, bg="white")
+        self.canvas.pack()
+        self.label = tk.Label(master, text="", font=("Helvetica", 14))
+        self.label.place(relx=1, anchor='ne', x=-20, y=10)
+
+        bottom_y = height - 200
+        self.track = Track(self.canvas, self.viewport, engine.left_x, bottom_y)
+
+        # Display copies of the blocks, moved to where the real ones are at the frame time
+        self.display = []
+        self.rects = []
+        for block, color in ((engine.block1, "blue"), (engine.block2, "red")):
+            display = Block(block.x, block.width, block.mass, block.velocity)
+            self.display.append(display)
+            self.rects.append(MovingRectangle(self.canvas, display, bottom_y - 10 - block.width, bottom_y - 10, color))
+
+        master.bind("+", lambda event: self.set_time_warp(self.time_warp * 2))
+        master.bind("=", lambda event: self.set_time_warp(self.time_warp * 2))
+        master.bind("-", lambda event: self.set_time_warp(self.time_warp / 2))
+
+        self.start_wall = time.perf_counter()
+        self.start_sim = engine.time
+        self.frame()
+
+    def sim_time(self):
+        return self.start_sim + (time.perf_counter() - self.start_wall) * self.time_warp
+
+    def set_time_warp(self, time_warp):
+        # Rebase the clocks so that simulated time carries on from where it is
+        self.start_sim = self.sim_time()
+        self.start_wall = time.perf_counter()
+        self.time_warp = time_warp
+
+    def frame(self):
+        started = time.perf_counter()
+        t = self.sim_time()
+        self.engine.advance_to(t)
+        self.draw(t)
+
+        elapsed_ms = int((time.perf_counter() - started) * 1000)
+        self.master.after(max(1000 // self.fps - elapsed_ms, 1), self.frame)
+
+    def draw(self, t):
+        engine = self.engine
+        for display, block, x in zip(self.display, (engine.block1, engine.block2), engine.positions_at(t)):
+            display.x = x
+            display.velocity = block.velocity
+
+        if self.viewport.zoom_to_fit(max(display.x + display.width for display in self.display)):
+            self.track.draw(self.viewport)
+
+        for rect in self.rects:
+            rect.draw(self.viewport)
+
+        done = " (Done)" if engine.is_done() else ""
+        self.label.config(text=f"Collisions: {engine.num_collisions}{done}\n"
+                               f"t = {round(t, 1)}, warp x{round(self.time_warp, 2)}")
+
+
+if __name__ == "__main__":
+    exponent = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+
+    root = tk.Tk()
+    root.title("Moving Rectangles and Wall Example")
+    app = Playback(root, feynman_engine(100**exponent, .01))
+    root.mainloop()
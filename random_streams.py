@@ -0,0 +1,86 @@
+"""
+    Random-variate streams for the gate model
+
+    Every source of randomness in GateModel (walks, group sizes, purchase
+    decisions, service times, line choice) gets its own numpy.random.Generator,
+    spawned from one seed. A stream draws its variates block_size at a time
+    with a single vectorised call and hands them out one by one, so the
+    customer processes pay a list lookup per variate instead of a call into
+    the random module.
+
+    Because the streams are independent, the k-th scanner service time of a
+    run is the same whatever the staffing or line policy, even though those
+    change how many walk or seller draws come before it: configurations run on
+    the same seed share their random numbers (common random numbers).
+"""
+
+import numpy as np
+
+BLOCK_SIZE = 4096
+
+
+class VariateStream:
+    __slots__ = ("draw", "block_size", "values", "index")
+
+    def __init__(self, draw, block_size=BLOCK_SIZE):
+        self.draw = draw
+        self.block_size = block_size
+        self.values = []
+        self.index = 0
+
+    def next(self):
+        if self.index == len(self.values):
+            # tolist() gives Python floats and ints, which are faster to hand out than NumPy scalars
+            self.values = self.draw(self.block_size).tolist()
+            self.index = 0
+        value = self.values[self.index]
+        self.index += 1
+        return value
+
+
+class UniformStream(VariateStream):
+    """
+        Uniform variates on [0, 1), with the parts of the random.Random
+        interface that line_selection uses
+    """
+
+    __slots__ = ()
+
+    def __init__(self, generator, block_size=BLOCK_SIZE):
+        super().__init__(generator.random, block_size)
+
+    def random(self):
+        return self.next()
+
+    def randrange(self, n):
+        return int(self.next() * n)
+
+    def sample(self, population, k):
+        chosen = []
+        while len(chosen) < k:
+            i = self.randrange(len(population))
+            if i not in chosen:
+                chosen.append(i)
+        return [population[i] for i in chosen]
+
+
+def normal_durations(generator, mean, std):
+    """
+        Normal durations clipped at zero: the far tail of the walk and service
+        time distributions is negative, which SimPy rejects
+    """
+    return lambda n: np.maximum(generator.normal(mean, std, n), 0)
+
+
+def group_sizes(generator, mean, std):
+    return lambda n: np.maximum(np.rint(generator.normal(mean, std, n)), 1).astype(np.int64)
+
+
+def spawn_generators(seed, names):
+    """
+        One independent Generator per name, all from seed. Generators are spawned
+        in the order of names, so new names must go at the end to keep existing
+        seeds reproducible
+    """
+    seeds = np.random.SeedSequence(seed).spawn(len(names))
+    return {name: np.random.default_rng(s) for name, s in zip(names, seeds)}
@@ -0,0 +1,186 @@
+"""
+    Monte Carlo replications of the gate model
+
+    Every replication draws its own buses and runs gate_model.GateModel
+    with its own seed (replication i uses seed base_seed + i, so any one of
+    them can be re-run on its own). Replications run in rounds over a pool of
+    worker processes; after each round the mean, p50 and p95 seller and
+    scanner waits are summarised across replications with confidence
+    intervals, and the run stops as soon as the half-width of every mean wait
+    interval is within the target.
+
+    Example:
+        python replications.py --max-replications 200 --half-width 0.25 --output replications.json
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import statistics
+from concurrent.futures import ProcessPoolExecutor
+
+from gate_model import GateModel, bus_arrivals
+from line_selection import POLICIES
+
+METRICS = ["seller_avg", "seller_p50", "seller_p95", "scanner_avg", "scanner_p50", "scanner_p95"]
+STOPPING_METRICS = ["seller_avg", "scanner_avg"]
+
+UNTIL = 200
+CONFIDENCE = 0.95
+HALF_WIDTH = 0.25  # Minutes
+MIN_REPLICATIONS = 10
+MAX_REPLICATIONS = 1000
+EXACT_T_DF = 30
+
+
+def wait_summary(stats):
+    return stats.mean, stats.quantile(0.5), stats.quantile(0.95)
+
+
+def run_replication(seed, until=UNTIL, config=None):
+    """
+        Runs one replication and returns its metrics. config holds GateModel
+        keyword arguments, such as the number of lines
+    """
+    buses = bus_arrivals(random.Random(f"buses-{seed}"))
+    model = GateModel(arrival_source=buses, seed=seed, **(config or {})).run(until)
+
+    result = {"seed": seed}
+    for prefix, stats in (("seller", model.seller_stats), ("scanner", model.scan_stats)):
+        result[f"{prefix}_avg"], result[f"{prefix}_p50"], result[f"{prefix}_p95"] = wait_summary(stats)
+    return result
+
+
+def t_cdf(t, df):
+    """
+        P(T <= t) for Student's t with a whole number df of degrees of freedom,
+        from the finite series of Abramowitz and Stegun 26.7.3 and 26.7.4
+    """
+    theta = math.atan(abs(t) / math.sqrt(df))
+    c2 = math.cos(theta) ** 2
+    term = total = 1.0
+    if df % 2:
+        for j in range(1, (df - 1) // 2):
+            term *= 2 * j / (2 * j + 1) * c2
+            total += term
+        a = 2 / math.pi * (theta + (math.sin(theta) * math.cos(theta) * total if df > 1 else 0))
+    else:
+        for j in range(1, df // 2):
+            term *= (2 * j - 1) / (2 * j) * c2
+            total += term
+        a = math.sin(theta) * total
+    return 0.5 + math.copysign(a, t) / 2
+
+
+def t_pdf(t, df):
+    return math.exp(math.lgamma((df + 1) / 2) - math.lgamma(df / 2)
+                    - (df + 1) / 2 * math.log1p(t * t / df)) / math.sqrt(df * math.pi)
+
+
+def t_quantile(p, df):
+    """
+        Quantile of Student's t distribution. The Cornish-Fisher expansion
+        around the normal quantile is within 0.01% of it above EXACT_T_DF
+        degrees of freedom, but 24% low at df = 1, so up to EXACT_T_DF it is
+        only the starting point of Newton's method on t_cdf
+    """
+    z = statistics.NormalDist().inv_cdf(p)
+    t = (z + (z**3 + z) / (4 * df)
+         + (5 * z**5 + 16 * z**3 + 3 * z) / (96 * df**2)
+         + (3 * z**7 + 19 * z**5 + 17 * z**3 - 15 * z) / (384 * df**3))
+    if df > EXACT_T_DF:
+        return t
+    for _ in range(100):
+        step = (t_cdf(t, df) - p) / t_pdf(t, df)
+        t -= step
+        if abs(step) <= 1e-12 * max(abs(t), 1):
+            break
+    return t
+
+
+def confidence_interval(values, confidence=CONFIDENCE):
+    """
+        Returns (mean, half-width) of the t interval for the mean of values
+    """
+    n = len(values)
+    mean = statistics.fmean(values)
+    if n < 2:
+        return mean, math.inf
+    return mean, t_quantile(0.5 + confidence / 2, n - 1) * statistics.stdev(values) / math.sqrt(n)
+
+
+def summarise(results, confidence=CONFIDENCE):
+    summary = {}
+    for metric in METRICS:
+        mean, half_width = confidence_interval([r[metric] for r in results], confidence)
+        summary[metric] = {"mean": mean, "half_width": half_width, "low": mean - half_width, "high": mean + half_width}
+    return summary
+
+
+def run_replications(until=UNTIL, config=None, half_width=HALF_WIDTH, confidence=CONFIDENCE,
+                     min_replications=MIN_REPLICATIONS, max_replications=MAX_REPLICATIONS,
+                     base_seed=0, workers=None):
+    """
+        Runs replications until the confidence intervals of the mean seller and
+        scanner waits are within half_width minutes, or max_replications have
+        run. Returns (summary, results)
+    """
+    workers = workers or os.cpu_count()
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while len(results) < max_replications:
+            # Rounds are at least a pool's worth, so the workers stay busy, and the
+            # stopping decision only ever sees whole rounds, so it does not depend
+            # on which worker finishes first
+            size = min(max(workers, min_replications - len(results)), max_replications - len(results))
+            seeds = range(base_seed + len(results), base_seed + len(results) + size)
+            results.extend(pool.map(run_replication, seeds, [until] * size, [config] * size))
+
+            summary = summarise(results, confidence)
+            if all(summary[metric]["half_width"] <= half_width for metric in STOPPING_METRICS):
+                break
+    return summary, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--until", type=float, default=UNTIL, help="simulated minutes per replication")
+    parser.add_argument("--half-width", type=float, default=HALF_WIDTH,
+                        help="target CI half-width of the mean waits, in minutes")
+    parser.add_argument("--confidence", type=float, default=CONFIDENCE)
+    parser.add_argument("--min-replications", type=int, default=MIN_REPLICATIONS)
+    parser.add_argument("--max-replications", type=int, default=MAX_REPLICATIONS)
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first replication")
+    parser.add_argument("--seller-lines", type=int, default=None)
+    parser.add_argument("--scanner-lines", type=int, default=None)
+    parser.add_argument("--policy", choices=POLICIES, default=None, help="how customers pick a line")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--output", default=None, help="write the summary and every replication to this JSON file")
+    args = parser.parse_args()
+
+    config = {}
+    if args.seller_lines is not None:
+        config["seller_lines"] = args.seller_lines
+    if args.scanner_lines is not None:
+        config["scanner_lines"] = args.scanner_lines
+    if args.policy is not None:
+        config["policy"] = args.policy
+
+    summary, results = run_replications(args.until, config, args.half_width, args.confidence,
+                                        args.min_replications, args.max_replications, args.seed, args.workers)
+
+    print(f"{len(results)} replications, {round(args.confidence * 100)}% confidence intervals (minutes):")
+    for metric in METRICS:
+        stats = summary[metric]
+        print(f"  {metric:<12} {stats['mean']:8.3f} ± {stats['half_width']:.3f}")
+
+    if args.output:
+        with open(args.output, "w") as outfile:
+            json.dump({"config": config, "until": args.until, "confidence": args.confidence,
+                       "summary": summary, "replications": results}, outfile, indent=2)
+
+
+if __name__ == "__main__":
+    main()
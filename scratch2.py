@@ -1,5 +1,10 @@
+import sys
 import tkinter as tk
 
+from block_view import MovingRectangle, Track, Viewport
+from collision_engine import Block, elastic_collision
+from sweep import run_sweep
+
 class SimulationExit(Exception):
     pass
 
@@ -10,6 +15,7 @@ class MovingRectangleSimulation:
         self.HEIGHT = 1500
         self.LEFT_X = 100
         self.WAIT_TIME = 1
+        self.viewport = Viewport(self.WIDTH)  # Zooming only changes the view, never the block models
         self.init_vel = init_vel
         self.simulation_running = True  # Flag to control simulation state
 
@@ -24,18 +30,12 @@ class MovingRectangleSimulation:
 
         bottom_y = self.HEIGHT - 200
 
-        rect1 = MovingRectangle(self.canvas, self.WIDTH - 300, bottom_y - 10 - 100, self.WIDTH - 300 + 100,
-                                bottom_y - 10, "blue", 1, 0)
-        rect2 = MovingRectangle(self.canvas, self.WIDTH - 300 + 200, bottom_y - 10 - 100, self.WIDTH - 300 + 200 + 100,
-                                bottom_y - 10, "red", 100**3, self.init_vel)
-
-        wall_left = self.canvas.create_line(self.LEFT_X, bottom_y, self.LEFT_X, 100, width=2, fill="black")
-        wall_bottom = self.canvas.create_line(self.LEFT_X, bottom_y, self.WIDTH * 100, bottom_y, width=2, fill="black")
+        rect1 = MovingRectangle(self.canvas, Block(self.WIDTH - 300, 100, 1, 0),
+                                bottom_y - 10 - 100, bottom_y - 10, "blue")
+        rect2 = MovingRectangle(self.canvas, Block(self.WIDTH - 300 + 200, 100, 100**3, self.init_vel),
+                                bottom_y - 10 - 100, bottom_y - 10, "red")
 
-        tick_spacing = 50
-        for x in range(0, self.WIDTH * 100, tick_spacing):
-            self.canvas.create_line(x, bottom_y - 5, x, bottom_y + 5, width=1, fill="black")
-            self.canvas.create_text(x, bottom_y + 15, text=str(x), anchor='n', font=("Helvetica", 8))
+        self.track = Track(self.canvas, self.viewport, self.LEFT_X, bottom_y, tick_spacing=50)
 
         self.rect1 = rect1
         self.rect2 = rect2
@@ -49,9 +49,6 @@ class MovingRectangleSimulation:
         self.rect1.move()
         self.rect2.move()
 
-        self.rect1.update_velocity_text()
-        self.rect2.update_velocity_text()
-
         self.rect1.collision_processed = False
         self.rect2.collision_processed = False
 
@@ -66,8 +63,7 @@ class MovingRectangleSimulation:
 
         if self.check_wall_collision(self.rect1):
             self.rect1.velocity *= -1
-            self.rect1.canvas.move(self.rect1.rectangle, self.LEFT_X - self.rect1.canvas.coords(self.rect1.rectangle)[0], 0)
-            self.rect1.canvas.move(self.rect1.text, self.LEFT_X - self.rect1.canvas.coords(self.rect1.rectangle)[0], 0)
+            self.rect1.block.x = self.LEFT_X
             self.rect1.collision_processed = True
 
         if self.check_wall_collision(self.rect2):
@@ -78,6 +74,7 @@ class MovingRectangleSimulation:
         if self.rect1.velocity > 0 and self.rect2.velocity > 0 and self.rect2.velocity > self.rect1.velocity:
             self.update_canvas()
         else:
+            self.draw_rectangles()
             self.master.after(self.WAIT_TIME, self.move_rectangles)
 
     def update_canvas(self, crossed=False):
@@ -87,24 +84,22 @@ class MovingRectangleSimulation:
             self.label = tk.Label(self.master, text=f"Collisions: {self.rect1.num_collisions}", font=("Helvetica", 14))
             self.label.place(relx=1, anchor='ne', x=-20, y=10)
 
-        max_x = max(self.canvas.bbox(self.rect1.rectangle)[2], self.canvas.bbox(self.rect2.rectangle)[2])
+        max_x = max(self.rect1.block.x + self.rect1.block.width, self.rect2.block.x + self.rect2.block.width)
+
+        if self.viewport.zoom_to_fit(max_x):
+            self.track.draw(self.viewport)
+
+        self.draw_rectangles()
 
-        if max_x > self.WIDTH:
-            scale_factor = self.WIDTH / max_x
-            self.canvas.scale("all", 0, 0, scale_factor, 1)
+    def draw_rectangles(self):
+        self.rect1.draw(self.viewport)
+        self.rect2.draw(self.viewport)
 
     def handle_collisions(self, rect1, rect2):
         if rect1.collision_processed or rect2.collision_processed:
             return
 
-        m1, v1 = rect1.mass, rect1.velocity
-        m2, v2 = rect2.mass, rect2.velocity
-
-        new_rect1_vel = ((m1 - m2) * v1 + 2 * m2 * v2) / (m1 + m2)
-        new_rect2_vel = ((m2 - m1) * v2 + 2 * m1 * v1) / (m1 + m2)
-
-        rect1.velocity = new_rect1_vel
-        rect2.velocity = new_rect2_vel
+        rect1.velocity, rect2.velocity = elastic_collision(rect1.mass, rect1.velocity, rect2.mass, rect2.velocity)
 
         rect1.collision_processed = True
         rect2.collision_processed = True
@@ -114,14 +109,11 @@ class MovingRectangleSimulation:
             raise SimulationExit()
 
     def check_rects_collision(self, rect1, rect2):
-        x1_rect1, _, x2_rect1, _ = rect1.canvas.coords(rect1.rectangle)
-        x1_rect2, _, x2_rect2, _ = rect2.canvas.coords(rect2.rectangle)
-
-        return x1_rect1 <= x2_rect2 and x2_rect1 >= x1_rect2
+        block1, block2 = rect1.block, rect2.block
+        return block1.x <= block2.x + block2.width and block1.x + block1.width >= block2.x
 
     def check_wall_collision(self, rect):
-        x1, _, _, _ = rect.canvas.coords(rect.rectangle)
-        return x1 <= self.LEFT_X
+        return rect.block.x <= self.LEFT_X
 
     def stop_simulation(self):
         self.simulation_running = False  # Set the flag to stop the simulation
@@ -132,33 +124,18 @@ class MovingRectangleSimulation:
         self.simulation_running = True
         self.move_rectangles()
 
-class MovingRectangle:
-    def __init__(self, canvas, x1, y1, x2, y2, color, mass, velocity):
-        self.canvas = canvas
-        self.rectangle = canvas.create_rectangle(x1, y1, x2, y2, fill=color)
-        self.text = canvas.create_text((x1 + x2) / 2, (y1 + y2) / 2, text="", fill="white")
-
-        self.mass = mass
-        self.velocity = velocity
-        self.collision_processed = False
-        self.num_collisions = 0
-
-        self.update_velocity_text()
-
-    def move(self):
-        self.canvas.move(self.rectangle, self.velocity, 0)
-        self.canvas.move(self.text, self.velocity, 0)
-
-    def update_velocity_text(self):
-        self.canvas.itemconfig(self.text, text=f"{self.mass} kg\n{round(self.velocity, 8)}")
-
 # Example usage
 if __name__ == "__main__":
+    INIT_VEL_VALUES = [-0.1, 0.1]  # Add different initial velocities here
+
+    if "--headless" in sys.argv:
+        # Run every velocity in parallel without a window; see sweep.py for the full grid
+        run_sweep([100**3], INIT_VEL_VALUES, "sweep.csv")
+        raise SystemExit
+
     root = tk.Tk()
     root.title("Moving Rectangles and Wall Example")
 
-    INIT_VEL_VALUES = [-0.1, 0.1]  # Add different initial velocities here
-
     def run_simulation(init_vel):
         print(f"Running simulation with initial velocity: {init_vel}")
         app = MovingRectangleSimulation(root, init_vel)
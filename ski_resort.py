@@ -5,20 +5,23 @@ import random
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import matplotlib.pyplot as plt
 
+from arrival_sources import poisson_arrivals
+
 BUS_ARRIVAL_MEAN = 3
 PERSON_ARRIVAL_MEAN = 0.1
 
 BUS_SIZE = 30
 
-ARRIVALS = [ random.expovariate(1 / BUS_ARRIVAL_MEAN) for _ in range(40) ]
+# Endless (gap, 1) pairs, drawn as they are needed
+ARRIVALS = poisson_arrivals(random, BUS_ARRIVAL_MEAN)
 
-PEOPLE = [ random.expovariate(1 / PERSON_ARRIVAL_MEAN) for _ in range(1000) ]
+PEOPLE = poisson_arrivals(random, PERSON_ARRIVAL_MEAN)
 
 
 def bus_arrival(env, line, len_queue):
 
     while True:
-        next_bus = ARRIVALS.pop()
+        next_bus, _ = next(ARRIVALS)
 
         yield env.timeout(next_bus)
 
@@ -44,7 +47,7 @@ def create_clock(env):
 def person_enters_line(env, line):
     id = 0
     while True:
-        next_person = PEOPLE.pop()
+        next_person, _ = next(PEOPLE)
 
         yield env.timeout(next_person)
 
@@ -0,0 +1,269 @@
+"""
+    Staffing search for the gate model
+
+    Explores a grid of SELLER_LINES x SELLERS_PER_LINE x SCANNER_LINES x
+    SCANNERS_PER_LINE and returns the cheapest configuration whose waits meet
+    the SLA: by default the p95 seller and scanner waits of a replication, on
+    average, must stay under the given limits.
+
+    Configurations are taken in order of cost. Each cost level is run in rounds
+    of replications over a process pool until every configuration in it is
+    known to meet the SLA or known to miss it at the given confidence, each
+    judged on its own intervals. A configuration whose seller waits miss the
+    SLA rules out every configuration with no more sellers, whatever its
+    scanners (the sellers are upstream of the scanners, so their waits do not
+    depend on them), and the first level with a passing configuration ends the
+    search, since everything left costs more.
+
+    When several configurations of that level pass, the one with the least
+    total wait is chosen by paired comparison. All configurations are run on
+    the same replication seeds, so they see the same buses and, since every
+    random quantity in the model has its own stream, the same walk, service
+    and group-size draws (common random numbers). The per-seed differences of
+    two configurations' waits then mostly reflect the staffing, and the
+    passing configurations get more rounds only until the interval of those
+    differences shows which one waits least.
+
+    Example:
+        python staffing.py --seller-lines 2 12 --scanner-lines 1 6 --seller-sla 5 --scanner-sla 1
+"""
+
+import argparse
+import itertools
+import json
+import os
+import statistics
+from concurrent.futures import ProcessPoolExecutor
+
+from gate_model import SELLERS_PER_LINE, SCANNERS_PER_LINE
+from replications import UNTIL, CONFIDENCE, confidence_interval, run_replication
+
+KEYS = ["seller_lines", "sellers_per_line", "scanner_lines", "scanners_per_line"]
+
+SELLER_SLA = 5  # Minutes
+SCANNER_SLA = 1
+SLA_STAT = "p95"
+SELLER_COST = 1
+SCANNER_COST = 1
+ROUND_SIZE = 10
+MAX_REPLICATIONS = 100
+
+PASS = "pass"
+FAIL = "fail"
+UNDECIDED = "undecided"
+
+
+def staffing_grid(seller_lines, scanner_lines, sellers_per_line=(SELLERS_PER_LINE,), scanners_per_line=(SCANNERS_PER_LINE,)):
+    return [
+        dict(zip(KEYS, values))
+        for values in itertools.product(seller_lines, sellers_per_line, scanner_lines, scanners_per_line)
+    ]
+
+
+def staffing_cost(config, seller_cost=SELLER_COST, scanner_cost=SCANNER_COST):
+    return (seller_cost * config["seller_lines"] * config["sellers_per_line"]
+            + scanner_cost * config["scanner_lines"] * config["scanners_per_line"])
+
+
+def fewer_sellers(config, other):
+    """
+        True if config has no more seller lines and no more sellers per line than other
+    """
+    return (config["seller_lines"] <= other["seller_lines"]
+            and config["sellers_per_line"] <= other["sellers_per_line"])
+
+
+class Candidate:
+    def __init__(self, config, cost):
+        self.config = config
+        self.cost = cost
+        self.results = []
+        self.status = UNDECIDED
+        self.failed = set()
+
+    def intervals(self, stat, confidence):
+        return {
+            prefix: confidence_interval([r[f"{prefix}_{stat}"] for r in self.results], confidence)
+            for prefix in ("seller", "scanner")
+        }
+
+    def judge(self, slas, stat, confidence, final=False):
+        """
+            Sets the status from the replications so far. A candidate passes when
+            both intervals lie under their SLA and fails as soon as either lies
+            over it. On the final round, the means decide
+        """
+        intervals = self.intervals(stat, confidence)
+        self.failed = {prefix for prefix, (mean, half_width) in intervals.items() if mean - half_width > slas[prefix]}
+        if final:
+            self.failed = {prefix for prefix, (mean, _) in intervals.items() if mean > slas[prefix]}
+
+        if self.failed:
+            self.status = FAIL
+        elif all(mean + half_width <= slas[prefix] for prefix, (mean, half_width) in intervals.items()) or final:
+            self.status = PASS
+        return self.status
+
+    def total_waits(self):
+        return [r["seller_avg"] + r["scanner_avg"] for r in self.results]
+
+    def total_wait(self):
+        return statistics.fmean(self.total_waits())
+
+    def beats(self, other, confidence):
+        """
+            True if self waits less than other in total, judged on the per-seed
+            differences of the replications both have run
+        """
+        differences = [theirs - ours for ours, theirs in zip(self.total_waits(), other.total_waits())]
+        mean, half_width = confidence_interval(differences, confidence)
+        return mean - half_width > 0
+
+
+def _run(args):
+    seed, until, config = args
+    return run_replication(seed, until, config)
+
+
+def run_round(pool, candidates, until, round_size, max_replications, base_seed):
+    """
+        Runs the next round_size seeds of every candidate, the same seeds for
+        candidates that have run as many replications
+    """
+    jobs, counts = [], []
+    for candidate in candidates:
+        start = base_seed + len(candidate.results)
+        seeds = range(start, min(start + round_size, base_seed + max_replications))
+        jobs.extend((seed, until, candidate.config) for seed in seeds)
+        counts.append(len(seeds))
+    results = iter(pool.map(_run, jobs))
+    for candidate, count in zip(candidates, counts):
+        candidate.results.extend(itertools.islice(results, count))
+
+
+def choose_best(passed, pool, until, confidence, round_size, max_replications, base_seed):
+    """
+        The passing candidate with the least total wait. Candidates it cannot
+        be told apart from yet get more rounds, as does the leader, until it
+        beats them all or they reach max_replications
+    """
+    while True:
+        best = min(passed, key=Candidate.total_wait)
+        tied = [candidate for candidate in passed if candidate is not best and not best.beats(candidate, confidence)]
+        running = [candidate for candidate in [best] + tied if len(candidate.results) < max_replications]
+        if not tied or not running:
+            return best, tied
+        run_round(pool, running, until, round_size, max_replications, base_seed)
+
+
+def search_staffing(grid, seller_sla=SELLER_SLA, scanner_sla=SCANNER_SLA, stat=SLA_STAT,
+                    seller_cost=SELLER_COST, scanner_cost=SCANNER_COST, until=UNTIL,
+                    confidence=CONFIDENCE, round_size=ROUND_SIZE, max_replications=MAX_REPLICATIONS,
+                    base_seed=0, workers=None, log=print):
+    """
+        Returns (best, candidates): the cheapest Candidate that meets the SLA,
+        or None, and every Candidate that was run or pruned
+    """
+    slas = {"seller": seller_sla, "scanner": scanner_sla}
+    remaining = sorted((Candidate(config, staffing_cost(config, seller_cost, scanner_cost)) for config in grid),
+                       key=lambda candidate: candidate.cost)
+    seen = []
+
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        while remaining:
+            cost = remaining[0].cost
+            level = [candidate for candidate in remaining if candidate.cost == cost]
+            remaining = [candidate for candidate in remaining if candidate.cost != cost]
+            seen.extend(level)
+
+            undecided = level
+            while undecided:
+                run_round(pool, undecided, until, round_size, max_replications, base_seed)
+                for candidate in undecided:
+                    candidate.judge(slas, stat, confidence, len(candidate.results) >= max_replications)
+                undecided = [candidate for candidate in undecided if candidate.status == UNDECIDED]
+
+            for candidate in level:
+                log(f"cost {cost:>4}: {describe(candidate.config)}  {candidate.status} "
+                    f"after {len(candidate.results)} replications ({format_intervals(candidate, stat, confidence)})")
+
+            passed = [candidate for candidate in level if candidate.status == PASS]
+            if passed:
+                best, tied = choose_best(passed, pool, until, confidence, round_size, max_replications, base_seed)
+                if len(passed) > 1:
+                    log(f"least total wait at cost {cost}: {describe(best.config)}"
+                        + (f", not told apart from {len(tied)} others after {max_replications} replications" if tied else ""))
+                for candidate in remaining:
+                    candidate.status = "pruned (costlier than a passing configuration)"
+                seen.extend(remaining)
+                return best, seen
+
+            seller_failed = [candidate for candidate in level if "seller" in candidate.failed]
+            pruned = [candidate for candidate in remaining
+                      if any(fewer_sellers(candidate.config, other.config) for other in seller_failed)]
+            for candidate in pruned:
+                candidate.status = "pruned (no more sellers than a configuration whose sellers failed)"
+            if pruned:
+                log(f"pruned {len(pruned)} configurations with no more sellers than one whose seller waits failed")
+            seen.extend(pruned)
+            remaining = [candidate for candidate in remaining if candidate not in pruned]
+
+    return None, seen
+
+
+def describe(config):
+    return (f"{config['seller_lines']} seller lines x {config['sellers_per_line']}, "
+            f"{config['scanner_lines']} scanner lines x {config['scanners_per_line']}")
+
+
+def format_intervals(candidate, stat, confidence):
+    return ", ".join(f"{prefix} {stat} {mean:.2f} ± {half_width:.2f}"
+                     for prefix, (mean, half_width) in candidate.intervals(stat, confidence).items())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seller-lines", type=int, nargs=2, default=[2, 12], metavar=("MIN", "MAX"))
+    parser.add_argument("--scanner-lines", type=int, nargs=2, default=[1, 6], metavar=("MIN", "MAX"))
+    parser.add_argument("--sellers-per-line", type=int, nargs="+", default=[SELLERS_PER_LINE])
+    parser.add_argument("--scanners-per-line", type=int, nargs="+", default=[SCANNERS_PER_LINE])
+    parser.add_argument("--seller-sla", type=float, default=SELLER_SLA, help="limit on the seller wait, in minutes")
+    parser.add_argument("--scanner-sla", type=float, default=SCANNER_SLA, help="limit on the scanner wait, in minutes")
+    parser.add_argument("--stat", choices=["avg", "p50", "p95"], default=SLA_STAT,
+                        help="per-replication wait statistic the SLA applies to")
+    parser.add_argument("--seller-cost", type=float, default=SELLER_COST)
+    parser.add_argument("--scanner-cost", type=float, default=SCANNER_COST)
+    parser.add_argument("--until", type=float, default=UNTIL)
+    parser.add_argument("--confidence", type=float, default=CONFIDENCE)
+    parser.add_argument("--round-size", type=int, default=ROUND_SIZE)
+    parser.add_argument("--max-replications", type=int, default=MAX_REPLICATIONS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--output", default=None, help="write every configuration's verdict to this JSON file")
+    args = parser.parse_args()
+
+    grid = staffing_grid(range(args.seller_lines[0], args.seller_lines[1] + 1),
+                         range(args.scanner_lines[0], args.scanner_lines[1] + 1),
+                         args.sellers_per_line, args.scanners_per_line)
+    best, candidates = search_staffing(grid, args.seller_sla, args.scanner_sla, args.stat,
+                                       args.seller_cost, args.scanner_cost, args.until, args.confidence,
+                                       args.round_size, args.max_replications, args.seed, args.workers)
+
+    run = sum(len(candidate.results) for candidate in candidates)
+    if best is None:
+        print(f"No configuration in the grid meets the SLA ({run} replications)")
+    else:
+        print(f"Cheapest configuration meeting the SLA: {describe(best.config)}, cost {best.cost} "
+              f"({run} replications over {len(grid)} configurations)")
+
+    if args.output:
+        with open(args.output, "w") as outfile:
+            json.dump([
+                {**candidate.config, "cost": candidate.cost, "status": candidate.status,
+                 "replications": len(candidate.results)}
+                for candidate in candidates
+            ], outfile, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+    Headless parallel sweep over (mass ratio, initial velocity) cases
+
+    Every case runs the scratch2.py layout in its own worker process and its
+    result is appended to a CSV file as soon as it completes. Cases already in
+    the file are skipped, so an interrupted sweep picks up where it stopped.
+
+    Example:
+        python sweep.py --exponents 1 2 3 4 5 --velocities -0.1 -0.01 --output sweep.csv
+"""
+
+import argparse
+import csv
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from collision_engine import Block, CollisionEngine
+from fast_count import fast_count
+
+FIELDS = ["mass_ratio", "init_vel", "collisions", "v1", "v2", "wall_time"]
+
+
+def run_case(mass_ratio, init_vel, engine="event"):
+    """
+        Runs a single case and returns its row. engine is "event" for the
+        collision-by-collision CollisionEngine, or "fast" for fast_count
+    """
+    start = time.perf_counter()
+    if engine == "fast":
+        collisions, v1, v2 = fast_count(1, mass_ratio, 0, init_vel, exact=mass_ratio > 100**7)
+    else:
+        simulation = CollisionEngine(Block(1700, 100, 1, 0), Block(1900, 100, mass_ratio, init_vel))
+        collisions = simulation.run()
+        v1, v2 = simulation.block1.velocity, simulation.block2.velocity
+    return {
+        "mass_ratio": mass_ratio,
+        "init_vel": init_vel,
+        "collisions": collisions,
+        "v1": float(v1),
+        "v2": float(v2),
+        "wall_time": time.perf_counter() - start,
+    }
+
+
+def case_key(mass_ratio, init_vel):
+    return repr(float(mass_ratio)), repr(float(init_vel))
+
+
+def is_complete(row):
+    """
+        True if a CSV row has every field and each one parses
+    """
+    if None in row or any(row.get(field) in (None, "") for field in FIELDS):
+        return False
+    try:
+        int(row["collisions"])
+        for field in ("mass_ratio", "init_vel", "v1", "v2", "wall_time"):
+            float(row[field])
+    except ValueError:
+        return False
+    return True
+
+
+def drop_partial_row(path):
+    """
+        Cuts off the last row if a killed sweep only wrote part of it. Complete
+        rows end with a line break, so the file ends with one when no row was
+        cut short, and new rows can be appended after it
+    """
+    with open(path, "rb+") as outfile:
+        data = outfile.read()
+        if not data or data.endswith(b"\n"):
+            return False
+        outfile.truncate(data.rfind(b"\n") + 1)
+        return True
+
+
+def completed_cases(path):
+    """
+        The cases of every complete row in path. Malformed rows are left out,
+        so those cases run again
+    """
+    if not os.path.exists(path):
+        return set()
+    with open(path, newline="") as infile:
+        return {case_key(row["mass_ratio"], row["init_vel"]) for row in csv.DictReader(infile) if is_complete(row)}
+
+
+def run_sweep(mass_ratios, init_vels, output, workers=None, engine="event"):
+    """
+        Runs every (mass ratio, initial velocity) combination that is not in
+        output yet, over a pool of workers processes (one per core by default).
+        Returns the number of cases that were run
+    """
+    if os.path.exists(output) and drop_partial_row(output):
+        print(f"Dropped a partly written last row from {output}")
+    done = completed_cases(output)
+    cases = [
+        (mass_ratio, init_vel) for mass_ratio in mass_ratios for init_vel in init_vels
+        if case_key(mass_ratio, init_vel) not in done
+    ]
+    if not cases:
+        return 0
+
+    new_file = not os.path.exists(output) or os.path.getsize(output) == 0
+    with open(output, "a", newline="") as outfile, \
+            ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        writer = csv.DictWriter(outfile, fieldnames=FIELDS)
+        if new_file:
+            writer.writeheader()
+
+        futures = [pool.submit(run_case, mass_ratio, init_vel, engine) for mass_ratio, init_vel in cases]
+        for future in as_completed(futures):
+            row = future.result()
+            writer.writerow({**row, "mass_ratio": repr(float(row["mass_ratio"])), "init_vel": repr(float(row["init_vel"]))})
+            outfile.flush()
+            print(f"Mass ratio {row['mass_ratio']}, velocity {row['init_vel']}: "
+                  f"{row['collisions']} collisions in {round(row['wall_time'], 3)}s")
+    return len(cases)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--exponents", type=int, nargs="+", default=[1, 2, 3, 4, 5],
+                        help="run mass ratios 100**k for these k")
+    parser.add_argument("--velocities", type=float, nargs="+", default=[-0.1, -0.01],
+                        help="initial velocities of the heavy block")
+    parser.add_argument("--output", default="sweep.csv")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--engine", choices=["event", "fast"], default="event")
+    args = parser.parse_args()
+
+    run_sweep([100**k for k in args.exponents], args.velocities, args.output, args.workers, args.engine)
+
+
+if __name__ == "__main__":
+    main()
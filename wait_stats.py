@@ -0,0 +1,182 @@
+"""
+    Streaming wait-time statistics for the gate model
+
+    Waits are folded in as they are registered, so reading the statistics at
+    any point of a run costs the same however many waits came before:
+
+        RunningStats    count, mean, variance, min and max (Welford's method)
+        QuantileSketch  any quantile to within 1% (a logarithmic histogram)
+        StreamStats     both together
+        WaitStats       a StreamStats over every wait, one per line and one per
+                        time window
+"""
+
+import math
+
+QUANTILES = (0.5, 0.95, 0.99)
+RELATIVE_ACCURACY = 0.01
+WINDOW = 1  # Minutes; the UI plots one point per window
+
+
+class RunningStats:
+    __slots__ = ("count", "mean", "m2", "min", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, x, count=1):
+        self.count += count
+        delta = x - self.mean
+        self.mean += delta * count / self.count
+        self.m2 += count * delta * (x - self.mean)
+        if x < self.min:
+            self.min = x
+        if x > self.max:
+            self.max = x
+
+    @property
+    def variance(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def stdev(self):
+        return math.sqrt(self.variance)
+
+
+class QuantileSketch:
+    """
+        Counts of values in logarithmically spaced bins, each relative_accuracy
+        wide, so any quantile is known to within relative_accuracy of its true
+        value (the DDSketch of Masson, Rim and Lee). Adding a value costs one
+        logarithm, and the number of bins only grows with the logarithm of the
+        range of the values. Values under MIN_VALUE count as 0
+    """
+
+    __slots__ = ("gamma_log", "gamma", "bins", "zeros", "count")
+
+    MIN_VALUE = 1e-9
+
+    def __init__(self, relative_accuracy=RELATIVE_ACCURACY):
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.gamma_log = math.log(self.gamma)
+        self.bins = {}
+        self.zeros = 0
+        self.count = 0
+
+    def add(self, x, count=1):
+        self.count += count
+        if x < self.MIN_VALUE:
+            self.zeros += count
+            return
+        k = math.ceil(math.log(x) / self.gamma_log)
+        self.bins[k] = self.bins.get(k, 0) + count
+
+    def quantile(self, p):
+        if self.count == 0:
+            return 0.0
+        rank = p * (self.count - 1)
+        seen = self.zeros
+        if seen > rank:
+            return 0.0
+        for k in sorted(self.bins):
+            seen += self.bins[k]
+            if seen > rank:
+                return 2 * self.gamma**k / (self.gamma + 1)
+        return 2 * self.gamma**k / (self.gamma + 1)
+
+
+class StreamStats:
+    __slots__ = ("stats", "sketch")
+
+    def __init__(self, relative_accuracy=RELATIVE_ACCURACY):
+        self.stats = RunningStats()
+        self.sketch = QuantileSketch(relative_accuracy)
+
+    def add(self, x, count=1):
+        self.stats.add(x, count)
+        self.sketch.add(x, count)
+
+    @property
+    def count(self):
+        return self.stats.count
+
+    @property
+    def mean(self):
+        return self.stats.mean
+
+    def quantile(self, p):
+        """
+            The p quantile, e.g. 0.95 for p95, clamped to the range of the values
+        """
+        if self.stats.count == 0:
+            return 0.0
+        return min(max(self.sketch.quantile(p), self.stats.min), self.stats.max)
+
+    def quantiles(self, ps=QUANTILES):
+        return {p: self.quantile(p) for p in ps}
+
+
+class WaitStats:
+    """
+        Statistics of the waits at one kind of line. Until the first wait,
+        every mean and quantile reads 0
+    """
+
+    def __init__(self, window=WINDOW, relative_accuracy=RELATIVE_ACCURACY):
+        self.window = window
+        self.relative_accuracy = relative_accuracy
+        self.total = StreamStats(relative_accuracy)
+        self.lines = {}
+        self.windows = {}
+        self.last_window = -1
+        self.changed_from = None  # Earliest window added to since the last take_changed()
+
+    def add(self, time, wait, line=None, count=1):
+        """
+            Registers count people who waited wait minutes up to time
+        """
+        self.total.add(wait, count)
+        if line is not None:
+            stats = self.lines.get(line)
+            if stats is None:
+                stats = self.lines[line] = StreamStats(self.relative_accuracy)
+            stats.add(wait, count)
+        window = int(time // self.window)
+        stats = self.windows.get(window)
+        if stats is None:
+            stats = self.windows[window] = StreamStats(self.relative_accuracy)
+            self.last_window = max(self.last_window, window)
+        stats.add(wait, count)
+        if self.changed_from is None or window < self.changed_from:
+            self.changed_from = window
+
+    def take_changed(self):
+        """
+            The earliest window added to since the last call, or None. Waits are
+            registered when they are reported, which can be after the window
+            they belong to has closed, so this need not be the latest window
+        """
+        changed, self.changed_from = self.changed_from, None
+        return changed
+
+    @property
+    def count(self):
+        return self.total.count
+
+    @property
+    def mean(self):
+        return self.total.mean
+
+    def quantile(self, p):
+        return self.total.quantile(p)
+
+    def window_means(self):
+        """
+            Lists of the start time and mean wait of every window so far
+        """
+        starts = sorted(self.windows)
+        return [w * self.window for w in starts], [self.windows[w].mean for w in starts]